@@ -0,0 +1,134 @@
+import importlib
+import os
+
+import streamlit as st
+
+from metrics import REGISTRY, span
+
+# Storage engine: "mssql" (SQL Server through the connection pool) or "sqlite" (local file or
+# ":memory:", no server needed)
+BACKEND = os.getenv("BACKEND", "mssql")
+
+BACKENDS = {
+    "mssql": "backends.mssql:MssqlBackend",
+    "sqlite": "backends.sqlite:SqliteBackend",
+}
+
+
+# Everything the app needs from storage. Rows are (no, time, shift, data_1, ..., data_5) on the
+# way out and (time, shift, data_1, ..., data_5) on the way in. Upserts match on data_1 and never
+# let an older row overwrite a newer one. Watermarks are integers that grow with every insert
+# or update, so readers can ask for what changed since they last looked.
+class Backend:
+    name = None
+    # Any database error
+    Error = Exception
+
+    # Whether a failed write is worth retrying later (connection lost, deadlock, timeout) rather
+    # than being about the rows themselves, which no retry fixes
+    def is_transient(self, error):
+        return True
+
+    # Every operation is timed into the backend_op histogram, labelled with backend and operation
+    def _timed(self, operation):
+        return span("backend_op", backend=self.name, op=operation)
+
+    # Create or migrate the schema; returns True when anything had to change
+    def ensure_schema(self):
+        raise NotImplementedError
+
+    def upsert(self, row):
+        self.upsert_many([row])
+
+    # Rows must be unique on data_1
+    def upsert_many(self, rows):
+        raise NotImplementedError
+
+    # (watermark, newest rows of the shift, skipping `offset`)
+    def latest(self, shift="All", limit=10, offset=0):
+        raise NotImplementedError
+
+    # (watermark, rows changed after the `since` watermark, oldest change first)
+    def changes(self, since, limit):
+        raise NotImplementedError
+
+    # Newest first in (time, no) order, starting after the (time, no) cursor `after`
+    def page(self, shift=None, start=None, end=None, after=None, limit=50):
+        raise NotImplementedError
+
+    # Matching rows oldest first, yielded in lists of at most `chunksize` rows
+    def export_rows(self, shift=None, start=None, end=None, chunksize=5000):
+        raise NotImplementedError
+
+    # Stage every chunk of rows, then upsert them in one transaction (newest row per data_1 wins);
+    # returns the number of rows inserted or updated
+    def import_chunks(self, chunks):
+        raise NotImplementedError
+
+    # (hour, shift, rows) per hour in [start, end), from the incrementally maintained summary
+    def hourly_counts(self, start, end):
+        raise NotImplementedError
+
+    # Shift names that stored rows (live or archived) carry, from the same summary
+    def stored_shifts(self):
+        raise NotImplementedError
+
+    # Move up to `limit` rows older than `before` from the live table to the archive; returns
+    # how many moved. Reads above keep seeing archived rows when their range reaches back that far.
+    def archive_before(self, before, limit):
+        raise NotImplementedError
+
+    # Up to `limit` (time, no, shift) of the live (or archived) rows that have a time, in
+    # (time, no) order after the (time, no) cursor `after`
+    def shift_rows(self, after=None, limit=5000, archived=False):
+        raise NotImplementedError
+
+    # Set the shift of (no, time, shift) rows in one transaction, skipping rows whose time has
+    # changed since they were read; returns how many changed
+    def update_shifts(self, rows, archived=False):
+        raise NotImplementedError
+
+    # Up to `limit` captured earlier versions of the record `data_1`, newest first, as
+    # (changed, time, shift, data_2, ..., data_5): the values an upsert replaced, set only for
+    # the columns whose bit is in `changed` (queries.CHANGE_BITS)
+    def record_changes(self, data_1, limit=100):
+        raise NotImplementedError
+
+    # Rows (live or archived) whose data_1 is one of `keys`, through the data_1 index;
+    # `nocase` matches them ignoring case
+    def lookup(self, keys, nocase=False):
+        raise NotImplementedError
+
+    # Newest rows with a word starting with `query` in any of `columns`, from a full-text
+    # index; only backends that have one implement it
+    def fulltext_search(self, query, columns, limit):
+        raise NotImplementedError(f"the {self.name} backend has no full-text search")
+
+    # [{"index", "pages", "fill_pct", "fragmentation_pct"}] for user_data's clustered and secondary indexes
+    def index_stats(self):
+        raise NotImplementedError
+
+    # Current highest watermark, for cheap change probes
+    def max_version(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def metrics(self):
+        latency = {labels["op"]: stats for _, labels, stats in REGISTRY.summary("backend_op", backend=self.name)}
+        return {"backend": self.name, "latency": latency}
+
+
+def create_backend(name=BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}; known backends: {', '.join(BACKENDS)}")
+    module, cls = BACKENDS[name].split(":")
+    # Imported on demand so the SQLite backend runs where pymssql is not installed
+    return getattr(importlib.import_module(module), cls)()
+
+
+# One backend per server process, shared by all sessions
+@st.cache_resource
+def get_backend():
+    return create_backend()
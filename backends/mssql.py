@@ -0,0 +1,129 @@
+import pymssql
+
+from backends import Backend
+from db import get_db_connection, get_pool, get_read_pool
+from queries import (ALL_ROWS, ARCHIVE, HOT, archive_boundary, archive_rows, create_fulltext, create_staging,
+                     current_watermark, data_1_nocase_collation, ensure_schema, iter_rows, merge_rows, merge_staging, row_source,
+                     select_by_keys, select_changes, select_changes_of, select_fulltext, select_hourly,
+                     select_index_stats, select_page, select_rows, select_shift_rows, select_stored_shifts,
+                     stage_rows, update_shift_rows)
+
+# Error numbers worth a retry. pymssql raises OperationalError for nearly every server error,
+# truncation (8152) and out-of-range dates (242) included, so the class says nothing.
+TRANSIENT_ERRORS = {
+    -2, 64, 121, 233, 10053, 10054, 10060,                    # timeouts, transport-level failures
+    20002, 20003, 20004, 20006, 20009, 20017, 20047,          # DB-Lib: connection lost or timed out
+    4060, 18456, 40197, 40501, 40613, 49918, 49919, 49920,    # database unavailable, login failed
+    701, 1204, 1205, 1222, 8645,                              # memory, lock resources, deadlock, lock timeout
+}
+
+
+# SQL Server through the shared pymssql connection pool; the SQL itself lives in queries.py
+class MssqlBackend(Backend):
+    name = "mssql"
+    Error = pymssql.Error
+    # Set once the full-text index has been checked or created
+    _fulltext = False
+    # queries.data_1_nocase_collation, looked up once ("" for none needed)
+    _nocase_collation = None
+
+    # Errors without a number (a closed connection, the driver itself) are retried too
+    def is_transient(self, error):
+        number = error.args[0] if error.args and isinstance(error.args[0], int) else None
+        return isinstance(error, pymssql.InterfaceError) or number is None or number in TRANSIENT_ERRORS
+
+    def ensure_schema(self):
+        with self._timed("ensure_schema"), get_db_connection() as conn:
+            return ensure_schema(conn)
+
+    def upsert_many(self, rows):
+        with self._timed("upsert_many"), get_db_connection() as conn:
+            merge_rows(conn, rows)
+
+    def latest(self, shift="All", limit=10, offset=0):
+        with self._timed("latest"), get_db_connection(read=True) as conn:
+            watermark = current_watermark(conn)
+            rows = select_rows(conn, shift=shift, limit=limit, offset=offset)
+            # Only reach into the archive when the live table cannot fill the window
+            if len(rows) < limit and archive_boundary(conn) is not None:
+                rows = select_rows(conn, shift=shift, limit=limit, offset=offset, source=ALL_ROWS)
+            return watermark, rows
+
+    def changes(self, since, limit):
+        with self._timed("changes"), get_db_connection(read=True) as conn:
+            watermark = current_watermark(conn)
+            return watermark, select_changes(conn, since, limit)
+
+    def page(self, shift=None, start=None, end=None, after=None, limit=50):
+        with self._timed("page"), get_db_connection(read=True) as conn:
+            source = row_source(start, archive_boundary(conn))
+            return select_page(conn, shift, start, end, after=after, limit=limit, source=source)
+
+    def export_rows(self, shift=None, start=None, end=None, chunksize=5000):
+        with self._timed("export_rows"), get_db_connection() as conn:
+            yield from iter_rows(conn, shift, start, end, chunksize, source=row_source(start, archive_boundary(conn)))
+
+    def import_chunks(self, chunks):
+        with self._timed("import_chunks"), get_db_connection() as conn:
+            cursor = conn.cursor()
+            create_staging(cursor)
+            for rows in chunks:
+                stage_rows(cursor, rows)
+            merged = merge_staging(cursor)
+            conn.commit()
+            return merged
+
+    def hourly_counts(self, start, end):
+        with self._timed("hourly_counts"), get_db_connection(read=True) as conn:
+            return select_hourly(conn, start, end)
+
+    def stored_shifts(self):
+        with self._timed("stored_shifts"), get_db_connection(read=True) as conn:
+            return select_stored_shifts(conn)
+
+    def archive_before(self, before, limit):
+        with self._timed("archive_before"), get_db_connection() as conn:
+            return archive_rows(conn, before, limit)
+
+    def shift_rows(self, after=None, limit=5000, archived=False):
+        with self._timed("shift_rows"), get_db_connection() as conn:
+            return select_shift_rows(conn, after, limit, table=ARCHIVE if archived else HOT)
+
+    def update_shifts(self, rows, archived=False):
+        with self._timed("update_shifts"), get_db_connection() as conn:
+            return update_shift_rows(conn, rows, table=ARCHIVE if archived else HOT)
+
+    def record_changes(self, data_1, limit=100):
+        with self._timed("record_changes"), get_db_connection(read=True) as conn:
+            return select_changes_of(conn, data_1, limit)
+
+    def lookup(self, keys, nocase=False):
+        with self._timed("lookup"), get_db_connection(read=True) as conn:
+            if nocase and self._nocase_collation is None:
+                self._nocase_collation = data_1_nocase_collation(conn) or ""
+            return select_by_keys(conn, list(keys), source=HOT if archive_boundary(conn) is None else ALL_ROWS,
+                                  collation=self._nocase_collation if nocase else None)
+
+    def fulltext_search(self, query, columns, limit):
+        with self._timed("fulltext_search"):
+            if not self._fulltext:
+                # DDL, so not on the read pool with its timeout
+                with get_db_connection() as conn:
+                    if not create_fulltext(conn):
+                        raise NotImplementedError("Full-Text Search is not installed on this SQL Server instance")
+                self._fulltext = True
+            with get_db_connection(read=True) as conn:
+                return select_fulltext(conn, query, columns, limit)
+
+    def index_stats(self):
+        with self._timed("index_stats"), get_db_connection() as conn:
+            return select_index_stats(conn)
+
+    def max_version(self):
+        with self._timed("max_version"), get_db_connection(read=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT CAST(MAX(rv) AS BIGINT) FROM user_data")
+            return cursor.fetchone()[0]
+
+    def metrics(self):
+        return {**super().metrics(), "pool": get_pool().metrics(), "read_pool": get_read_pool().metrics()}
@@ -0,0 +1,437 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from backends import Backend
+from metrics import span
+from queries import ALL_ROWS, ARCHIVE, CHANGE_HISTORY, HOT, row_source
+
+# Database file for the SQLite backend; ":memory:" keeps everything in RAM for tests
+SQLITE_PATH = os.getenv("SQLITE_PATH", "user_data.db")
+# Bump whenever SCHEMA below changes (stored in PRAGMA user_version)
+SCHEMA_VERSION = 7
+
+# SQLite limits bound parameters per statement
+MAX_KEYS_PER_STATEMENT = 500
+
+# Fixed-width text so time ordering and comparisons are plain string comparisons
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# user_data mirrors the SQL Server table. rv plays the part of ROWVERSION: triggers stamp every
+# inserted or updated row with the next value of the rowversion counter.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    no INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT,
+    shift TEXT,
+    data_1 TEXT NOT NULL UNIQUE,
+    data_2 TEXT,
+    data_3 TEXT,
+    data_4 TEXT,
+    data_5 TEXT,
+    rv INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_time ON user_data(time);
+CREATE INDEX IF NOT EXISTS idx_shift_time ON user_data(shift, time DESC);
+CREATE INDEX IF NOT EXISTS idx_rv ON user_data(rv);
+CREATE INDEX IF NOT EXISTS idx_data_1_nocase ON user_data(data_1 COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS rowversion (value INTEGER NOT NULL);
+INSERT INTO rowversion (value) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM rowversion);
+CREATE TRIGGER IF NOT EXISTS user_data_rv_insert AFTER INSERT ON user_data
+BEGIN
+    UPDATE rowversion SET value = value + 1;
+    UPDATE user_data SET rv = (SELECT value FROM rowversion) WHERE no = NEW.no;
+END;
+CREATE TRIGGER IF NOT EXISTS user_data_rv_update
+AFTER UPDATE OF time, shift, data_1, data_2, data_3, data_4, data_5 ON user_data
+BEGIN
+    UPDATE rowversion SET value = value + 1;
+    UPDATE user_data SET rv = (SELECT value FROM rowversion) WHERE no = NEW.no;
+END;
+CREATE TABLE IF NOT EXISTS user_data_hourly (
+    hour TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (hour, shift)
+) WITHOUT ROWID;
+INSERT INTO user_data_hourly (hour, shift, row_count)
+SELECT substr(time, 1, 13) || ':00:00.000000', COALESCE(shift, ''), COUNT(*)
+FROM user_data
+WHERE time IS NOT NULL AND NOT EXISTS (SELECT 1 FROM user_data_hourly)
+GROUP BY 1, 2;
+CREATE TRIGGER IF NOT EXISTS user_data_hourly_insert AFTER INSERT ON user_data WHEN NEW.time IS NOT NULL
+BEGIN
+    INSERT INTO user_data_hourly (hour, shift, row_count)
+    VALUES (substr(NEW.time, 1, 13) || ':00:00.000000', COALESCE(NEW.shift, ''), 1)
+    ON CONFLICT (hour, shift) DO UPDATE SET row_count = row_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS user_data_hourly_update AFTER UPDATE OF time, shift ON user_data
+BEGIN
+    UPDATE user_data_hourly SET row_count = row_count - 1
+    WHERE OLD.time IS NOT NULL AND hour = substr(OLD.time, 1, 13) || ':00:00.000000' AND shift = COALESCE(OLD.shift, '');
+    INSERT INTO user_data_hourly (hour, shift, row_count)
+    SELECT substr(NEW.time, 1, 13) || ':00:00.000000', COALESCE(NEW.shift, ''), 1 WHERE NEW.time IS NOT NULL
+    ON CONFLICT (hour, shift) DO UPDATE SET row_count = row_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS user_data_hourly_delete AFTER DELETE ON user_data WHEN OLD.time IS NOT NULL
+BEGIN
+    UPDATE user_data_hourly SET row_count = row_count - 1
+    WHERE hour = substr(OLD.time, 1, 13) || ':00:00.000000' AND shift = COALESCE(OLD.shift, '');
+END;
+CREATE TABLE IF NOT EXISTS user_data_archive (
+    no INTEGER NOT NULL,
+    time TEXT,
+    shift TEXT,
+    data_1 TEXT NOT NULL,
+    data_2 TEXT,
+    data_3 TEXT,
+    data_4 TEXT,
+    data_5 TEXT,
+    archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_archive_time ON user_data_archive(time, no);
+CREATE INDEX IF NOT EXISTS idx_archive_shift_time ON user_data_archive(shift, time DESC);
+CREATE INDEX IF NOT EXISTS idx_archive_data_1 ON user_data_archive(data_1);
+CREATE INDEX IF NOT EXISTS idx_archive_data_1_nocase ON user_data_archive(data_1 COLLATE NOCASE);
+CREATE TRIGGER IF NOT EXISTS user_data_archive_hourly_insert AFTER INSERT ON user_data_archive WHEN NEW.time IS NOT NULL
+BEGIN
+    INSERT INTO user_data_hourly (hour, shift, row_count)
+    VALUES (substr(NEW.time, 1, 13) || ':00:00.000000', COALESCE(NEW.shift, ''), 1)
+    ON CONFLICT (hour, shift) DO UPDATE SET row_count = row_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS user_data_archive_hourly_update AFTER UPDATE OF time, shift ON user_data_archive
+BEGIN
+    UPDATE user_data_hourly SET row_count = row_count - 1
+    WHERE OLD.time IS NOT NULL AND hour = substr(OLD.time, 1, 13) || ':00:00.000000' AND shift = COALESCE(OLD.shift, '');
+    INSERT INTO user_data_hourly (hour, shift, row_count)
+    SELECT substr(NEW.time, 1, 13) || ':00:00.000000', COALESCE(NEW.shift, ''), 1 WHERE NEW.time IS NOT NULL
+    ON CONFLICT (hour, shift) DO UPDATE SET row_count = row_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS user_data_archive_hourly_delete AFTER DELETE ON user_data_archive WHEN OLD.time IS NOT NULL
+BEGIN
+    UPDATE user_data_hourly SET row_count = row_count - 1
+    WHERE hour = substr(OLD.time, 1, 13) || ':00:00.000000' AND shift = COALESCE(OLD.shift, '');
+END;
+CREATE TABLE IF NOT EXISTS user_data_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    no INTEGER NOT NULL,
+    data_1 TEXT NOT NULL,
+    changed INTEGER NOT NULL,
+    time TEXT,
+    shift TEXT,
+    data_2 TEXT,
+    data_3 TEXT,
+    data_4 TEXT,
+    data_5 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_changes_data_1 ON user_data_changes(data_1, id DESC);
+"""
+
+# CHANGE_HISTORY for SQLite: a TEMP trigger lives only on this connection, so capture is on or
+# off per process without touching the schema. Upserts always set time; the shift backfill
+# does not, so its updates are not captured (as with the MERGE capture on SQL Server).
+CAPTURE_TRIGGER = """
+CREATE TEMP TRIGGER IF NOT EXISTS user_data_capture AFTER UPDATE OF time ON main.user_data
+WHEN OLD.time IS NOT NEW.time OR OLD.shift IS NOT NEW.shift OR OLD.data_2 IS NOT NEW.data_2
+    OR OLD.data_3 IS NOT NEW.data_3 OR OLD.data_4 IS NOT NEW.data_4 OR OLD.data_5 IS NOT NEW.data_5
+BEGIN
+    INSERT INTO user_data_changes (no, data_1, changed, time, shift, data_2, data_3, data_4, data_5)
+    VALUES (NEW.no, NEW.data_1,
+            (OLD.time IS NOT NEW.time) + 2 * (OLD.shift IS NOT NEW.shift) + 4 * (OLD.data_2 IS NOT NEW.data_2)
+            + 8 * (OLD.data_3 IS NOT NEW.data_3) + 16 * (OLD.data_4 IS NOT NEW.data_4) + 32 * (OLD.data_5 IS NOT NEW.data_5),
+            CASE WHEN OLD.time IS NOT NEW.time THEN OLD.time END, CASE WHEN OLD.shift IS NOT NEW.shift THEN OLD.shift END,
+            CASE WHEN OLD.data_2 IS NOT NEW.data_2 THEN OLD.data_2 END, CASE WHEN OLD.data_3 IS NOT NEW.data_3 THEN OLD.data_3 END,
+            CASE WHEN OLD.data_4 IS NOT NEW.data_4 THEN OLD.data_4 END, CASE WHEN OLD.data_5 IS NOT NEW.data_5 THEN OLD.data_5 END);
+END;
+"""
+
+SELECT = "SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5 FROM {source}"
+
+# INSERT ... ON CONFLICT is SQLite's MERGE; the WHERE keeps the "never overwrite a newer row" guard
+UPSERT = """
+ON CONFLICT (data_1) DO UPDATE SET
+    time = excluded.time, shift = excluded.shift, data_2 = excluded.data_2,
+    data_3 = excluded.data_3, data_4 = excluded.data_4, data_5 = excluded.data_5
+WHERE user_data.time IS NULL OR excluded.time >= user_data.time
+"""
+
+# queries.RESTORE_ARCHIVED for SQLite: an archived copy of an incoming data_1 moves back into
+# user_data before the upsert, so the time guard sees it and the record is counted once
+RESTORE_ARCHIVED = ("""
+INSERT INTO user_data (time, shift, data_1, data_2, data_3, data_4, data_5)
+SELECT time, shift, data_1, data_2, data_3, data_4, data_5
+FROM (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY data_1 ORDER BY time DESC, no DESC) AS rn
+    FROM user_data_archive WHERE data_1 IN ({keys})
+)
+WHERE rn = 1 AND true
+ON CONFLICT (data_1) DO UPDATE SET
+    time = excluded.time, shift = excluded.shift, data_2 = excluded.data_2,
+    data_3 = excluded.data_3, data_4 = excluded.data_4, data_5 = excluded.data_5
+WHERE user_data.time IS NULL OR excluded.time > user_data.time
+""", "DELETE FROM user_data_archive WHERE data_1 IN ({keys})")
+
+
+def _to_db(value):
+    return value.strftime(TIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def _from_db(row):
+    return (row[0], datetime.fromisoformat(row[1]) if row[1] else None, *row[2:])
+
+
+def _where(shift=None, start=None, end=None):
+    clauses, params = [], []
+    if shift and shift != "All":
+        clauses.append("shift = ?")
+        params.append(shift)
+    if start is not None:
+        clauses.append("time >= ?")
+        params.append(_to_db(start))
+    if end is not None:
+        clauses.append("time < ?")
+        params.append(_to_db(end))
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# SQLite with the same semantics as SQL Server, for laptops, CI and benchmarks without a server.
+# One connection shared by every thread; the lock makes each operation atomic, so a watermark
+# and the rows read with it always match.
+class SqliteBackend(Backend):
+    name = "sqlite"
+    Error = sqlite3.Error
+
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+
+    # Locks held by another process and I/O trouble pass; other operational errors (a missing
+    # table, too many variables) would fail the same way every time
+    def is_transient(self, error):
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and any(
+            word in message for word in ("locked", "busy", "disk i/o", "unable to open"))
+
+    def ensure_schema(self):
+        with self._timed("ensure_schema"), self._lock:
+            changed = self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION
+            if changed:
+                self._conn.executescript(SCHEMA)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            if CHANGE_HISTORY:
+                self._conn.executescript(CAPTURE_TRIGGER)
+            return changed
+
+    def _watermark(self):
+        return self._conn.execute("SELECT value FROM rowversion").fetchone()[0]
+
+    # Inside the caller's transaction; `keys` is SQL for the incoming data_1 values
+    def _restore_archived(self, keys, params=()):
+        if self._archive_boundary() is None:
+            return
+        for statement in RESTORE_ARCHIVED:
+            self._conn.execute(statement.format(keys=keys), params)
+
+    def upsert_many(self, rows):
+        with self._timed("upsert_many"), self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                with span("db_merge"):
+                    for start in range(0, len(rows), MAX_KEYS_PER_STATEMENT):
+                        keys = [row[2] for row in rows[start:start + MAX_KEYS_PER_STATEMENT]]
+                        self._restore_archived(", ".join("?" * len(keys)), keys)
+                    self._conn.executemany(f"""
+                    INSERT INTO user_data (time, shift, data_1, data_2, data_3, data_4, data_5)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    {UPSERT}
+                    """, [(_to_db(row[0]), *row[1:]) for row in rows])
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            with span("db_commit"):
+                self._conn.execute("COMMIT")
+
+    def _archive_boundary(self):
+        boundary = self._conn.execute("SELECT MAX(time) FROM user_data_archive").fetchone()[0]
+        return datetime.fromisoformat(boundary) if boundary else None
+
+    def latest(self, shift="All", limit=10, offset=0):
+        where, params = _where(shift)
+        sql = f" {where} ORDER BY time DESC LIMIT ? OFFSET ?"
+        with self._timed("latest"), self._lock:
+            rows = self._conn.execute(SELECT.format(source=HOT) + sql, (*params, limit, offset)).fetchall()
+            if len(rows) < limit and self._archive_boundary() is not None:
+                rows = self._conn.execute(SELECT.format(source=ALL_ROWS) + sql, (*params, limit, offset)).fetchall()
+            return self._watermark(), [_from_db(row) for row in rows]
+
+    def changes(self, since, limit):
+        with self._timed("changes"), self._lock:
+            rows = self._conn.execute(SELECT.format(source=HOT) + " WHERE rv > ? ORDER BY rv LIMIT ?", (since or 0, limit)).fetchall()
+            return self._watermark(), [_from_db(row) for row in rows]
+
+    def page(self, shift=None, start=None, end=None, after=None, limit=50):
+        where, params = _where(shift, start, end)
+        if after is not None:
+            where = (where + " AND" if where else "WHERE") + " (time < ? OR (time = ? AND no < ?))"
+            params += [_to_db(after[0]), _to_db(after[0]), after[1]]
+        with self._timed("page"), self._lock:
+            source = row_source(start, self._archive_boundary())
+            rows = self._conn.execute(SELECT.format(source=source) + f" {where} ORDER BY time DESC, no DESC LIMIT ?",
+                                      (*params, limit)).fetchall()
+            return [_from_db(row) for row in rows]
+
+    def export_rows(self, shift=None, start=None, end=None, chunksize=5000):
+        where, params = _where(shift, start, end)
+        with self._timed("export_rows"):
+            with self._lock:
+                source = row_source(start, self._archive_boundary())
+                cursor = self._conn.execute(SELECT.format(source=source) + f" {where} ORDER BY time, no", params)
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+                yield [_from_db(row) for row in rows]
+
+    def import_chunks(self, chunks):
+        with self._timed("import_chunks"), self._lock:
+            self._conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_staging (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                time TEXT, shift TEXT, data_1 TEXT NOT NULL,
+                data_2 TEXT, data_3 TEXT, data_4 TEXT, data_5 TEXT
+            )
+            """)
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM import_staging")
+                for rows in chunks:
+                    self._conn.executemany("""
+                    INSERT INTO import_staging (time, shift, data_1, data_2, data_3, data_4, data_5)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, [(_to_db(row[0]), *row[1:]) for row in rows])
+                self._restore_archived("SELECT data_1 FROM import_staging")
+                # "WHERE true" keeps SQLite from reading ON CONFLICT as part of the SELECT
+                merged = self._conn.execute(f"""
+                INSERT INTO user_data (time, shift, data_1, data_2, data_3, data_4, data_5)
+                SELECT time, shift, data_1, data_2, data_3, data_4, data_5
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY data_1 ORDER BY time DESC, seq DESC) AS rn
+                    FROM import_staging
+                )
+                WHERE rn = 1 AND true
+                {UPSERT}
+                """).rowcount
+                self._conn.execute("DELETE FROM import_staging")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return merged
+
+    def hourly_counts(self, start, end):
+        with self._timed("hourly_counts"), self._lock:
+            rows = self._conn.execute("""
+            SELECT hour, shift, row_count FROM user_data_hourly
+            WHERE hour >= ? AND hour < ? AND row_count > 0
+            ORDER BY hour, shift
+            """, (_to_db(start), _to_db(end))).fetchall()
+            return [(datetime.fromisoformat(hour), shift, count) for hour, shift, count in rows]
+
+    def stored_shifts(self):
+        with self._timed("stored_shifts"), self._lock:
+            rows = self._conn.execute("SELECT DISTINCT shift FROM user_data_hourly WHERE row_count > 0 AND shift <> ''").fetchall()
+            return [shift for shift, in rows]
+
+    def archive_before(self, before, limit):
+        oldest = "SELECT no FROM user_data WHERE time < ? ORDER BY time LIMIT ?"
+        with self._timed("archive_before"), self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"""
+                INSERT INTO user_data_archive (no, time, shift, data_1, data_2, data_3, data_4, data_5)
+                SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5
+                FROM user_data WHERE no IN ({oldest})
+                """, (_to_db(before), limit))
+                moved = self._conn.execute(f"DELETE FROM user_data WHERE no IN ({oldest})", (_to_db(before), limit)).rowcount
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return moved
+
+    def shift_rows(self, after=None, limit=5000, archived=False):
+        where, params = "WHERE time IS NOT NULL", []
+        if after is not None:
+            where += " AND (time > ? OR (time = ? AND no > ?))"
+            params += [_to_db(after[0]), _to_db(after[0]), after[1]]
+        with self._timed("shift_rows"), self._lock:
+            rows = self._conn.execute(f"SELECT time, no, shift FROM {ARCHIVE if archived else HOT} {where} ORDER BY time, no LIMIT ?",
+                                      (*params, limit)).fetchall()
+        return [(datetime.fromisoformat(time), no, shift) for time, no, shift in rows]
+
+    def update_shifts(self, rows, archived=False):
+        with self._timed("update_shifts"), self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                updated = self._conn.executemany(f"""
+                UPDATE {ARCHIVE if archived else HOT} SET shift = ?
+                WHERE no = ? AND time = ? AND shift IS NOT ?
+                """, [(shift, no, _to_db(time), shift) for no, time, shift in rows]).rowcount
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return updated
+
+    def record_changes(self, data_1, limit=100):
+        with self._timed("record_changes"), self._lock:
+            rows = self._conn.execute("""
+            SELECT changed, time, shift, data_2, data_3, data_4, data_5 FROM user_data_changes
+            WHERE data_1 = ? ORDER BY id DESC LIMIT ?
+            """, (data_1, limit)).fetchall()
+        return [(changed, datetime.fromisoformat(time) if time else None, *rest) for changed, time, *rest in rows]
+
+    # NOCASE only folds ASCII letters, which is all a serial number has
+    def lookup(self, keys, nocase=False):
+        keys = list(keys)
+        collate = " COLLATE NOCASE" if nocase else ""
+        rows = []
+        with self._timed("lookup"), self._lock:
+            source = HOT if self._archive_boundary() is None else ALL_ROWS
+            for start in range(0, len(keys), MAX_KEYS_PER_STATEMENT):
+                chunk = keys[start:start + MAX_KEYS_PER_STATEMENT]
+                rows += self._conn.execute(SELECT.format(source=source) + f" WHERE data_1{collate} IN ({', '.join('?' * len(chunk))})",
+                                           chunk).fetchall()
+        return [_from_db(row) for row in rows]
+
+    # From dbstat. SQLite interleaves the pages of every b-tree in one file, so logical
+    # fragmentation means nothing here (fragmentation_pct is None); page splits show up as a
+    # low fill instead
+    def index_stats(self):
+        with self._timed("index_stats"), self._lock:
+            try:
+                rows = self._conn.execute("""
+                    SELECT name, COUNT(*), SUM(pgsize - unused) * 100.0 / SUM(pgsize) FROM dbstat
+                    WHERE pagetype = 'leaf' AND name IN (
+                        SELECT name FROM sqlite_schema WHERE tbl_name = 'user_data' AND type IN ('table', 'index'))
+                    GROUP BY name
+                """).fetchall()
+            except sqlite3.OperationalError:
+                # Built without SQLITE_ENABLE_DBSTAT_VTAB
+                return []
+        return [{"index": name, "pages": pages, "fill_pct": round(fill, 2), "fragmentation_pct": None}
+                for name, pages, fill in rows]
+
+    def max_version(self):
+        with self._timed("max_version"), self._lock:
+            return self._conn.execute("SELECT MAX(rv) FROM user_data").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from backends import get_backend
+from shifts import get_shift_calendar
+
+# Rows read and rewritten per batch when stored shifts are recomputed, and seconds to pause
+# between batches so submits never wait long on the locks
+SHIFT_BACKFILL_BATCH = int(os.getenv("SHIFT_BACKFILL_BATCH", "5000"))
+SHIFT_BACKFILL_PAUSE = float(os.getenv("SHIFT_BACKFILL_PAUSE", "0.1"))
+
+
+def _publish_locally():
+    from write_queue import get_write_queue
+
+    get_write_queue().publish(None)
+
+
+# Recomputes the shift column of existing rows with the current shift calendar, live rows
+# first and then the archive. It walks each table in (time, no) order in batches, assigns the
+# shifts of a whole batch at once and only writes the rows whose shift actually changes.
+# The hourly summary triggers follow every update, so the dashboard comes out right too.
+class ShiftBackfill:
+    def __init__(self, batch=SHIFT_BACKFILL_BATCH, pause=SHIFT_BACKFILL_PAUSE, notify=_publish_locally):
+        self.batch = max(batch, 1)
+        self.pause = pause
+        self.notify = notify
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"running": False, "calendar": None, "since": None, "scanned": 0, "updated": 0,
+                       "batches": 0, "last_started": None, "last_finished": None, "last_run_ms": 0.0,
+                       "errors": 0, "last_error": None}
+
+    # Recompute rows with a time at or after `since` (all rows when None); returns the stats
+    def run(self, since=None, archive=True):
+        calendar = get_shift_calendar()
+        backend = get_backend()
+        started = time.monotonic()
+        with self._lock:
+            self._stats.update(running=True, calendar=calendar.version, scanned=0, updated=0, batches=0,
+                               since=since.isoformat(sep=" ") if since else None,
+                               last_started=datetime.now().isoformat(sep=" ", timespec="seconds"))
+        updated = 0
+        try:
+            for archived in (False, True) if archive else (False,):
+                # `no` starts at 1, so (since, 0) takes in rows written exactly at `since`
+                after = (since, 0) if since else None
+                while not self._stopping.is_set():
+                    rows = backend.shift_rows(after, self.batch, archived=archived)
+                    if not rows:
+                        break
+                    shifts = calendar.shifts_of(pd.Series([row[0] for row in rows], dtype="datetime64[ns]"))
+                    changed = [(no, written_at, shift) for (written_at, no, old), shift in zip(rows, shifts) if shift != old]
+                    batch_updated = backend.update_shifts(changed, archived=archived) if changed else 0
+                    updated += batch_updated
+                    after = rows[-1][:2]
+                    with self._lock:
+                        self._stats["scanned"] += len(rows)
+                        self._stats["updated"] += batch_updated
+                        self._stats["batches"] += 1
+                    if len(rows) < self.batch:
+                        break
+                    time.sleep(self.pause)
+        finally:
+            if updated:
+                # Cached reads still show the old shifts
+                self.notify()
+            with self._lock:
+                self._stats["running"] = False
+                self._stats["last_finished"] = datetime.now().isoformat(sep=" ", timespec="seconds")
+                self._stats["last_run_ms"] = round((time.monotonic() - started) * 1000, 2)
+        return self.metrics()
+
+    def _run(self, since, archive):
+        try:
+            self.run(since, archive)
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+
+    # Run in the background; returns False when a run is already going
+    def start(self, since=None, archive=True):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, args=(since, archive), name="shift-backfill", daemon=True)
+            self._thread.start()
+            return True
+
+    def close(self):
+        self._stopping.set()
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+# One backfill per server process, started from the sidebar
+@st.cache_resource
+def get_shift_backfill():
+    return ShiftBackfill()
+
+
+# Recompute stored shifts from the command line after editing the calendar, e.g.
+#   SHIFT_CALENDAR=calendar.json python backfill.py --since 2026-01-01
+# Running apps are told over the bus (BUS=file or a custom transport) to drop cached reads.
+def main(argv=None):
+    from bus import get_bus
+
+    parser = argparse.ArgumentParser(description="Recompute the shift column of existing rows with the shift calendar.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="only rows written at or after this time (default: all rows)")
+    parser.add_argument("--live-only", action="store_true", help="skip the archive table")
+    parser.add_argument("--batch", type=int, default=SHIFT_BACKFILL_BATCH, help="rows per batch")
+    args = parser.parse_args(argv)
+    get_backend().ensure_schema()
+    job = ShiftBackfill(batch=args.batch, notify=lambda: get_bus().publish(None))
+    print(json.dumps(job.run(args.since, archive=not args.live_only), indent=2))
+
+
+if __name__ == "__main__":
+    main()
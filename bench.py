@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Benchmark of the submit and read paths against a local backend (SQLite by default), e.g.
+#   python bench.py --rows 100000 --concurrency 8 --ops 20000 --update-ratio 0.5 > bench_output.txt
+# Prints one JSON document with p50/p95/p99 latency and throughput per scenario.
+
+SCENARIOS = ("submit", "form", "read")
+SEED_CHUNK = 50000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark add_or_update_data, update_form and get_data.")
+    parser.add_argument("--backend", default="sqlite", help="storage backend (default: sqlite)")
+    parser.add_argument("--sqlite-path", default=None, help="SQLite file (default: a fresh temp file; ':memory:' works too)")
+    parser.add_argument("--rows", type=int, default=1000, help="rows seeded into user_data before the run (1k to 10M)")
+    parser.add_argument("--concurrency", type=int, default=4, help="threads (sessions) per scenario")
+    parser.add_argument("--ops", type=int, default=2000, help="submits per write scenario")
+    parser.add_argument("--reads", type=int, default=2000, help="get_data calls in the read scenario")
+    parser.add_argument("--update-ratio", type=float, default=0.0,
+                        help="share of submits that hit an existing data_1 (MERGE update) instead of a new one")
+    parser.add_argument("--random-keys", action="store_true",
+                        help="new data_1 values are random like real scan strings instead of increasing")
+    parser.add_argument("--live", action="store_true", help="read in live mode (query only when the watcher moved)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--flush-interval", type=float, default=None, help="WRITE_FLUSH_INTERVAL for the run")
+    parser.add_argument("--batch-size", type=int, default=None, help="WRITE_BATCH_SIZE for the run")
+    parser.add_argument("--seed", type=int, default=1, help="random seed, for reproducible key choices")
+    parser.add_argument("--out", default=None, help="write the JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+# Point the app modules at a throwaway database and spool; they read these when first imported
+def configure(args, workdir):
+    os.environ["BACKEND"] = args.backend
+    os.environ["SQLITE_PATH"] = args.sqlite_path or os.path.join(workdir, "bench.db")
+    os.environ["SPOOL_PATH"] = os.path.join(workdir, "spool.db")
+    if args.flush_interval is not None:
+        os.environ["WRITE_FLUSH_INTERVAL"] = str(args.flush_interval)
+    if args.batch_size is not None:
+        os.environ["WRITE_BATCH_SIZE"] = str(args.batch_size)
+    os.environ["WRITE_QUEUE_MAX"] = str(max(args.ops * 2, 100000))
+
+
+# st.session_state is one shared object outside `streamlit run`; give every benchmark thread
+# its own, like one browser session each
+class ThreadSessionState:
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        if not hasattr(self._local, "state"):
+            self._local.state = {}
+        return self._local.state
+
+    def __getitem__(self, key):
+        return self._state()[key]
+
+    def __setitem__(self, key, value):
+        self._state()[key] = value
+
+    def __contains__(self, key):
+        return key in self._state()
+
+    def get(self, key, default=None):
+        return self._state().get(key, default)
+
+    def pop(self, key, *default):
+        return self._state().pop(key, *default)
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1] * 1000, 3),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3)}
+
+
+def seed_rows(backend, rows):
+    started = time.perf_counter()
+    base = datetime(2024, 1, 1)
+
+    def chunks():
+        for start in range(0, rows, SEED_CHUNK):
+            yield [(base + timedelta(seconds=i), "D", f"seed-{i}", "a", "b", "c", "d")
+                   for i in range(start, min(start + SEED_CHUNK, rows))]
+
+    if rows:
+        backend.import_chunks(chunks())
+    return round(time.perf_counter() - started, 3)
+
+
+# Run `work(thread_index, op_index)` `ops` times spread over `concurrency` threads; returns
+# (per-call latencies, wall seconds, results)
+def run_threads(concurrency, ops, work):
+    latencies = [[] for _ in range(concurrency)]
+    results = [[] for _ in range(concurrency)]
+    start_gate = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        start_gate.wait()
+        for op in range(index, ops, concurrency):
+            started = time.perf_counter()
+            result = work(index, op)
+            latencies[index].append(time.perf_counter() - started)
+            results[index].append(result)
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"bench-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return [x for xs in latencies for x in xs], time.perf_counter() - started, [x for xs in results for x in xs]
+
+
+def bench_writes(args, scenario, rng):
+    import streamlit as st
+
+    from mc1.data import add_or_update_data
+    from mc1.ui import update_form
+    from write_queue import get_write_queue
+
+    # Decide every key up front so threads only do the work being measured
+    prefix = f"{scenario}-{time.time_ns()}"
+    keys = [f"seed-{rng.randrange(args.rows)}" if args.rows and rng.random() < args.update_ratio
+            else f"{rng.getrandbits(64):016x}" if args.random_keys else f"{prefix}-{op}"
+            for op in range(args.ops)]
+
+    def submit(index, op):
+        return add_or_update_data(keys[op], "a", "b", "c", "d")
+
+    def form(index, op):
+        for n, value in enumerate((keys[op], "a", "b", "c", "d"), start=1):
+            st.session_state[f"data_{n}"] = value
+        update_form()
+        return st.session_state["tickets"][-1] if st.session_state.get("form_submitted") else None
+
+    latencies, seconds, tickets = run_threads(args.concurrency, args.ops, submit if scenario == "submit" else form)
+    queue = get_write_queue()
+    flushed_at = time.perf_counter()
+    queue.flush()
+    drain = time.perf_counter() - flushed_at
+    tickets = [ticket for ticket in tickets if ticket is not None]
+    persisted = [ticket.persisted_at - ticket.submitted_at for ticket in tickets if ticket.status == "persisted"]
+    return {
+        "ops": args.ops,
+        "seconds": round(seconds, 3),
+        "submits_per_sec": round(args.ops / seconds, 1),
+        "persisted_per_sec": round(len(persisted) / (seconds + drain), 1),
+        "failed": sum(ticket.status == "failed" for ticket in tickets),
+        "latency_ms": percentiles(latencies),
+        "persist_latency_ms": percentiles(persisted),
+    }
+
+
+def bench_reads(args, rng):
+    from mc1.data import get_data
+    from mc1.themes import get_theme
+
+    columns = get_theme()["columns"]
+    shifts = ["All", "A", "B", "C", "D"]
+    # Every thread is one viewer that sticks to its shift, like a kiosk
+    choices = [shifts[rng.randrange(len(shifts))] for _ in range(args.concurrency)]
+
+    def read(index, op):
+        return len(get_data(choices[index], columns, args.live))
+
+    latencies, seconds, _ = run_threads(args.concurrency, args.reads, read)
+    return {
+        "ops": args.reads,
+        "seconds": round(seconds, 3),
+        "reads_per_sec": round(args.reads / seconds, 1),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="mc1-bench-") as workdir:
+        configure(args, workdir)
+        import streamlit as st
+
+        st.session_state = ThreadSessionState()
+        from backends import get_backend
+        from write_queue import get_write_queue
+
+        backend = get_backend()
+        backend.ensure_schema()
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key != "out"},
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count(), "backend": backend.name},
+            "seed_seconds": seed_rows(backend, args.rows),
+            "results": {},
+        }
+        # Page counts and fragmentation before and after the writes, per index of user_data
+        report["index_stats_before"] = backend.index_stats()
+        for scenario in scenarios:
+            if scenario == "read":
+                report["results"][scenario] = bench_reads(args, rng)
+            else:
+                report["results"][scenario] = bench_writes(args, scenario, rng)
+        report["index_stats_after"] = backend.index_stats()
+        report["backend_latency"] = backend.metrics()["latency"]
+        report["write_queue"] = get_write_queue().metrics()
+        get_write_queue().close()
+        backend.close()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
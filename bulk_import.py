@@ -0,0 +1,113 @@
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backends import get_backend
+from shifts import get_shift_calendar
+from validation import TIME_MAX, TIME_MIN, get_validator
+from write_queue import get_write_queue
+
+# Rows read from the upload per chunk
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+
+DATA_COLUMNS = ["data_1", "data_2", "data_3", "data_4", "data_5"]
+# Rows reported back per chunk so the page can show where the rejects are
+MAX_REJECTS_REPORTED = 20
+
+
+class ImportFileError(Exception):
+    pass
+
+
+# Stream the upload as DataFrames of at most `chunksize` rows, every cell read as text
+def read_chunks(file, name, chunksize=IMPORT_CHUNK_SIZE):
+    if name.lower().endswith(".csv"):
+        yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunksize)
+        return
+    try:
+        # Excel files cannot be read incrementally; split them after loading
+        frame = pd.read_excel(file, dtype=str, keep_default_na=False)
+    except ImportError as e:
+        raise ImportFileError("reading Excel files needs openpyxl (pip install openpyxl)") from e
+    for start in range(0, len(frame), chunksize):
+        yield frame.iloc[start:start + chunksize]
+
+
+# "Data 1", "data1" and "DATA_1" all mean data_1
+def _column_name(name):
+    name = str(name).strip().lower().replace(" ", "_")
+    if name.startswith("data") and name[4:].lstrip("_").isdigit():
+        return "data_" + name[4:].lstrip("_")
+    return name
+
+
+# Clean one chunk: normalize and check the data columns against the validation rules
+# (column operations over the whole chunk), drop rows that fail or have an unreadable or
+# out-of-range time, and derive shift from the time column (or the import time when the
+# file has none).
+# Returns (rows, rejects) where rejects are (file row number, reason).
+def normalize_chunk(chunk, first_row, imported_at):
+    chunk = chunk.rename(columns=_column_name)
+    missing = [column for column in DATA_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ImportFileError(f"missing columns: {', '.join(missing)}")
+
+    frame, bad, reasons = get_validator().validate_frame(chunk)
+    row_numbers = np.arange(first_row, first_row + len(frame))
+
+    if "time" in chunk.columns:
+        times = pd.to_datetime(chunk["time"].str.strip(), errors="coerce")
+        bad_time = times.isna().to_numpy() & ~bad
+        reasons = np.where(bad_time, "unreadable time", reasons)
+        bad = bad | bad_time
+        # NaT compares False both ways, so only readable times land here
+        out_of_range = ((times < TIME_MIN) | (times > TIME_MAX)).to_numpy() & ~bad
+        reasons = np.where(out_of_range, f"time outside {TIME_MIN.year}-{TIME_MAX.year}", reasons)
+        bad = bad | out_of_range
+        times = times.fillna(pd.Timestamp(imported_at))
+    else:
+        times = pd.Series(pd.Timestamp(imported_at), index=frame.index)
+
+    frame.insert(0, "shift", get_shift_calendar().shifts_of(times))
+    frame.insert(0, "time", list(times.dt.to_pydatetime()))
+
+    keep = ~bad
+    rejects = list(zip(row_numbers[bad].tolist(), reasons[bad].tolist()))
+    rows = list(frame[keep].itertuples(index=False, name=None))
+    return rows, rejects
+
+
+# Import an uploaded CSV/Excel file in one transaction: chunks are validated and staged,
+# then upserted in one set-based statement. `progress(stats)` is called after every chunk.
+def import_file(file, name, chunksize=IMPORT_CHUNK_SIZE, progress=None):
+    started = time.monotonic()
+    imported_at = datetime.now()
+    stats = {"rows_read": 0, "rows_staged": 0, "rows_rejected": 0, "rows_merged": 0,
+             "rejects": [], "seconds": 0.0, "rows_per_sec": 0.0}
+
+    # Validated chunks are handed to the backend as they are read, so only one is held at a time
+    def chunks():
+        # Row 1 of the file is the header
+        first_row = 2
+        for chunk in read_chunks(file, name, chunksize):
+            rows, rejects = normalize_chunk(chunk, first_row, imported_at)
+            first_row += len(chunk)
+            yield rows
+            stats["rows_read"] += len(chunk)
+            stats["rows_staged"] += len(rows)
+            stats["rows_rejected"] += len(rejects)
+            stats["rejects"] += rejects[:MAX_REJECTS_REPORTED - len(stats["rejects"])]
+            stats["seconds"] = time.monotonic() - started
+            stats["rows_per_sec"] = stats["rows_read"] / stats["seconds"] if stats["seconds"] else 0.0
+            if progress is not None:
+                progress(stats)
+
+    stats["rows_merged"] = get_backend().import_chunks(chunks())
+    stats["seconds"] = time.monotonic() - started
+    stats["rows_per_sec"] = stats["rows_read"] / stats["seconds"] if stats["seconds"] else 0.0
+    # Too many rows to hand to listeners one by one; None tells them to drop everything
+    get_write_queue().publish(None)
+    return stats
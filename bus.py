@@ -0,0 +1,176 @@
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import streamlit as st
+
+# Transport that carries "these rows changed" events between replicas: "local" keeps them in
+# this process (one replica), "file" shares an append-only log between processes on one host
+# (or on a shared mount). Anything else is loaded as "module:Class".
+BUS = os.getenv("BUS", "local")
+BUS_PATH = os.getenv("BUS_PATH", os.path.join(tempfile.gettempdir(), "mc1-bus.log"))
+BUS_POLL = float(os.getenv("BUS_POLL", "0.2"))                        # seconds between reads of the log
+BUS_MAX_BYTES = int(os.getenv("BUS_MAX_BYTES", str(16 * 1024 * 1024)))  # log is truncated past this
+# Name of this replica on the bus; events it sent itself are ignored when they come back
+BUS_REPLICA = os.getenv("BUS_REPLICA", "") or uuid.uuid4().hex[:12]
+
+TRANSPORTS = {
+    "local": "bus:LocalTransport",
+    "file": "bus:FileTransport",
+}
+
+
+# A transport moves opaque messages (bytes) to every replica, possibly including the sender.
+# start(deliver) begins calling deliver(message) for incoming messages from its own thread.
+class Transport:
+    name = None
+
+    def start(self, deliver):
+        raise NotImplementedError
+
+    def send(self, message):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# Single-replica stand-in: nothing leaves the process
+class LocalTransport(Transport):
+    name = "local"
+
+    def start(self, deliver):
+        pass
+
+    def send(self, message):
+        pass
+
+
+# Every replica appends one line per event to a shared log and tails it from where it
+# started, so no broker process is needed. O_APPEND writes land whole even when several
+# processes write at once. Whichever writer sees the log past BUS_MAX_BYTES truncates it.
+# Readers notice the file shrinking and start again from the top.
+class FileTransport(Transport):
+    name = "file"
+
+    def __init__(self, path=BUS_PATH, poll=BUS_POLL, max_bytes=BUS_MAX_BYTES):
+        self.path = path
+        self.poll = poll
+        self.max_bytes = max_bytes
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self, deliver):
+        # Only events written from now on; older ones concern caches that no longer exist
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._thread = threading.Thread(target=self._tail, args=(deliver, offset), name="bus-file", daemon=True)
+        self._thread.start()
+
+    def send(self, message):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            if os.fstat(fd).st_size > self.max_bytes:
+                os.ftruncate(fd, 0)
+            os.write(fd, message + b"\n")
+        finally:
+            os.close(fd)
+
+    def _tail(self, deliver, offset):
+        while not self._stopping.wait(self.poll):
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                offset = 0
+                continue
+            if size < offset:
+                offset = 0
+            if size == offset:
+                continue
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+            # A line still being written is picked up on the next poll
+            end = data.rfind(b"\n") + 1
+            offset += end
+            for line in data[:end].splitlines():
+                if line:
+                    deliver(line)
+
+    def close(self):
+        self._stopping.set()
+
+
+def create_transport(name=BUS):
+    module, cls = TRANSPORTS.get(name, name).split(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+# Fans committed-row events out to the other replicas and hands theirs to local listeners,
+# so every replica drops (or refreshes) the cache entries a write on any replica touched
+class InvalidationBus:
+    def __init__(self, transport, replica=BUS_REPLICA):
+        self.transport = transport
+        self.replica = replica
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "received": 0, "own": 0, "errors": 0, "last_error": None, "last_delay_s": None}
+        transport.start(self._receive)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    # rows=None (a bulk change) travels as null and means "drop everything" on every replica
+    def publish(self, rows):
+        message = {"origin": self.replica, "sent_at": time.time(),
+                   "rows": None if rows is None else [[row[0].isoformat(), *row[1:]] for row in rows]}
+        try:
+            self.transport.send(json.dumps(message, separators=(",", ":")).encode())
+            with self._lock:
+                self._stats["sent"] += 1
+        except OSError as e:
+            self._error(e)
+
+    def _receive(self, raw):
+        try:
+            message = json.loads(raw)
+            if message["origin"] == self.replica:
+                with self._lock:
+                    self._stats["own"] += 1
+                return
+            rows = message["rows"]
+            if rows is not None:
+                rows = [(datetime.fromisoformat(row[0]), *row[1:]) for row in rows]
+        except (ValueError, KeyError, TypeError) as e:
+            self._error(e)
+            return
+        with self._lock:
+            self._stats["received"] += 1
+            self._stats["last_delay_s"] = round(time.time() - message["sent_at"], 3)
+        for listener in list(self._listeners):
+            try:
+                listener(rows)
+            except Exception as e:
+                self._error(e)
+
+    def _error(self, e):
+        with self._lock:
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(e)
+
+    def close(self):
+        self.transport.close()
+
+    def metrics(self):
+        with self._lock:
+            return {"transport": self.transport.name, "replica": self.replica, **self._stats}
+
+
+# One bus per server process
+@st.cache_resource
+def get_bus():
+    return InvalidationBus(create_transport())
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+import streamlit as st
+
+from write_queue import get_write_queue
+
+# Seconds a cached query result is served before it is fetched again
+CACHE_TTL = float(os.getenv("CACHE_TTL", "5"))
+
+
+# Process-wide TTL cache for query results shared by every session. Concurrent misses
+# on the same key wait for a single load, so N viewers cost one query.
+class ResultCache:
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}  # key -> (expires_at, value)
+        self._loading = {}  # key -> Event set when the in-flight load finishes
+        self._epoch = 0     # bumped on every invalidation; loads started before it are not stored
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def get(self, key, load):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._stats["hits"] += 1
+                    return entry[1]
+                event = self._loading.get(key)
+                if event is None:
+                    self._stats["misses"] += 1
+                    self._loading[key] = event = threading.Event()
+                    epoch = self._epoch
+                    break
+            # Someone else is loading this key; wait and read their result
+            event.wait()
+        try:
+            value = load()
+            with self._lock:
+                self._stats["loads"] += 1
+                if epoch == self._epoch:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            event.set()
+
+    # Drop every entry whose key matches; with no predicate the whole cache is cleared
+    def invalidate(self, predicate=None):
+        with self._lock:
+            self._epoch += 1
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                **self._stats,
+            }
+
+
+# Keys of the Latest Data cache are (shift, limit, page); a write only touches its own shift and "All"
+def invalidate_rows(cache, rows):
+    if rows is None:
+        cache.invalidate()
+        return
+    shifts = {row[1] for row in rows} | {"All"}
+    cache.invalidate(lambda key: key[0] in shifts)
+
+
+# One cache per server process, invalidated whenever the write-behind queue commits a batch
+@st.cache_resource
+def get_result_cache():
+    cache = ResultCache()
+    get_write_queue().add_listener(lambda rows: invalidate_rows(cache, rows))
+    return cache
@@ -0,0 +1,273 @@
+import atexit
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymssql
+import streamlit as st
+from dotenv import load_dotenv
+
+from metrics import span
+from reads import READ_TIMEOUT
+
+# Load environment variables from .env
+load_dotenv()
+
+# Database connection settings
+SERVER = os.getenv("SERVER")
+USER = os.getenv("USER")
+PASSWORD = os.getenv("PASSWORD")
+DATABASE = os.getenv("DATABASE")
+
+# Connection pool settings
+POOL_MIN_SIZE = int(os.getenv("POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", "10"))            # max seconds to wait for a free connection
+POOL_IDLE_TIMEOUT = float(os.getenv("POOL_IDLE_TIMEOUT", "300"))  # close idle connections above min size after this
+POOL_PING_AFTER = float(os.getenv("POOL_PING_AFTER", "5"))       # ping on checkout if idle longer than this
+POOL_CONNECT_RETRIES = int(os.getenv("POOL_CONNECT_RETRIES", "3"))
+POOL_BACKOFF = float(os.getenv("POOL_BACKOFF", "0.5"))           # first reconnect delay, doubled per attempt
+POOL_LOGIN_TIMEOUT = int(os.getenv("POOL_LOGIN_TIMEOUT", "10"))
+POOL_QUERY_TIMEOUT = int(os.getenv("POOL_QUERY_TIMEOUT", "0"))  # seconds before the server cancels a statement; 0 = never
+# Reads (Latest Data, History, Dashboard, lookups, change probes) use their own pool whose
+# statements are cancelled after this many seconds, so a hung read gives its executor thread
+# back instead of holding it; by default as long as a session waits for a read
+READ_QUERY_TIMEOUT = int(os.getenv("READ_QUERY_TIMEOUT", str(math.ceil(READ_TIMEOUT))))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def _connect(timeout=POOL_QUERY_TIMEOUT):
+    return pymssql.connect(server=SERVER, user=USER, password=PASSWORD, database=DATABASE,
+                           login_timeout=POOL_LOGIN_TIMEOUT, timeout=timeout)
+
+
+# Thread-safe bounded pool of pymssql connections shared by every session thread
+class ConnectionPool:
+    def __init__(self, connect, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 idle_timeout=POOL_IDLE_TIMEOUT, ping_after=POOL_PING_AFTER,
+                 retries=POOL_CONNECT_RETRIES, backoff=POOL_BACKOFF):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.retries = retries
+        self.backoff = backoff
+        self._idle = deque()  # (conn, last_used); right end is the most recently used
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_failures": 0,
+            "failed_pings": 0,
+            "discarded": 0,
+            "evicted": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    # Open a new connection, retrying with exponential backoff
+    def _open(self):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                with span("db_connect"):
+                    conn = self._connect()
+                with self._cond:
+                    self._stats["connects"] += 1
+                return conn
+            except pymssql.Error:
+                with self._cond:
+                    self._stats["connect_failures"] += 1
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _ping(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            return True
+        except pymssql.Error:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except pymssql.Error:
+            pass
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        conn = None
+        last_used = 0.0
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("connection pool is closed")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no database connection available after {self.timeout:.1f}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+            waited = time.monotonic() - started
+            self._stats["checkouts"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+
+        try:
+            if conn is None:
+                conn = self._open()
+            elif time.monotonic() - last_used > self.ping_after and not self._ping(conn):
+                with self._cond:
+                    self._stats["failed_pings"] += 1
+                self._close(conn)
+                conn = self._open()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn, broken=False):
+        if not broken:
+            # Never hand an open transaction to the next borrower
+            try:
+                conn.rollback()
+            except pymssql.Error:
+                broken = True
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed:
+                self._size -= 1
+                if broken:
+                    self._stats["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            self._close(conn)
+
+    # Close connections idle longer than idle_timeout, keeping at least min_size open
+    def evict_idle(self):
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+                self._stats["evicted"] += 1
+            missing = 0 if self._closed else max(self.min_size - self._size, 0)
+            self._size += missing
+        for conn in expired:
+            self._close(conn)
+        for _ in range(missing):
+            try:
+                conn = self._open()
+            except pymssql.Error:
+                with self._cond:
+                    self._size -= 1
+                continue
+            with self._cond:
+                self._idle.appendleft((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close(conn)
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._stats)
+            checkouts = stats.pop("checkouts")
+            wait_total = stats.pop("wait_total")
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "wait_avg_ms": round(wait_total / checkouts * 1000, 2) if checkouts else 0.0,
+                "wait_max_ms": round(stats.pop("wait_max") * 1000, 2),
+                **stats,
+            }
+
+
+# Background thread that evicts idle connections and keeps min_size warm
+def _run_maintenance(pool, interval):
+    while not pool._closed:
+        pool.evict_idle()
+        time.sleep(interval)
+
+
+def _start_pool(pool, name):
+    interval = max(min(pool.idle_timeout / 2, 30), 1)
+    threading.Thread(target=_run_maintenance, args=(pool, interval), name=name, daemon=True).start()
+    atexit.register(pool.close)
+    return pool
+
+
+# One pool per server process, shared by all sessions
+@st.cache_resource
+def get_pool():
+    return _start_pool(ConnectionPool(_connect), "db-pool-maintenance")
+
+
+# Same limits, connections opened with READ_QUERY_TIMEOUT; writes, imports, exports and schema
+# work stay on get_pool(), where nothing is cut short
+@st.cache_resource
+def get_read_pool():
+    return _start_pool(ConnectionPool(lambda: _connect(READ_QUERY_TIMEOUT)), "db-read-pool-maintenance")
+
+
+# `read=True` borrows from the read pool
+@contextmanager
+def get_db_connection(read=False):
+    pool = get_read_pool() if read else get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except (pymssql.OperationalError, pymssql.InterfaceError):
+        # The connection itself is suspect; drop it instead of returning it to the pool
+        pool.release(conn, broken=True)
+        raise
+    except BaseException:
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
@@ -0,0 +1,71 @@
+import csv
+import io
+import os
+import tempfile
+import time
+
+from backends import get_backend
+from queries import COLUMNS
+
+# Rows fetched from SQL Server and written out per chunk (one Parquet row group each)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+class ExportError(Exception):
+    pass
+
+
+def write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield len(rows)
+    text.flush()
+    text.detach()
+
+
+def write_parquet(chunks, out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow)") from e
+    schema = pa.schema([("no", pa.int32()), ("time", pa.timestamp("ms")), ("shift", pa.string())]
+                       + [(column, pa.string()) for column in COLUMNS[3:]])
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in chunks:
+            columns = zip(*rows)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+            yield len(rows)
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+# Export the matching rows to a temp file chunk by chunk, never holding more than one chunk.
+# `progress(stats)` is called after every chunk. Returns (path, stats); the caller deletes the file.
+def export_to_file(fmt, shift=None, start=None, end=None, chunksize=EXPORT_CHUNK_SIZE, progress=None):
+    if fmt not in WRITERS:
+        raise ExportError(f"unknown export format {fmt!r}")
+    started = time.monotonic()
+    stats = {"rows": 0, "chunks": 0, "bytes": 0, "seconds": 0.0}
+    out = tempfile.NamedTemporaryFile(prefix="user_data_", suffix="." + fmt, delete=False)
+    try:
+        with out:
+            for written in WRITERS[fmt](get_backend().export_rows(shift, start, end, chunksize), out):
+                stats["rows"] += written
+                stats["chunks"] += 1
+                stats["seconds"] = time.monotonic() - started
+                if progress is not None:
+                    progress(stats)
+    except BaseException:
+        os.unlink(out.name)
+        raise
+    stats["bytes"] = os.path.getsize(out.name)
+    stats["seconds"] = time.monotonic() - started
+    return out.name, stats
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from backends import get_backend
+from queries import CHANGE_BITS, CHANGE_COLUMNS, HISTORY_PAGE_SIZE
+from write_queue import get_write_queue
+
+# Pages kept in the process-wide LRU and how long a cached page stays valid
+HISTORY_CACHE_PAGES = int(os.getenv("HISTORY_CACHE_PAGES", "64"))
+HISTORY_CACHE_TTL = float(os.getenv("HISTORY_CACHE_TTL", "60"))
+# Versions shown in a record's timeline
+TIMELINE_LIMIT = int(os.getenv("TIMELINE_LIMIT", "100"))
+
+# Where each CHANGE_COLUMNS value sits in a (time, shift, data_1, ..., data_5) version
+VERSION_POSITIONS = {"time": 0, "shift": 1, "data_2": 3, "data_3": 4, "data_4": 5, "data_5": 6}
+
+
+# Keyset pager over user_data shared by all sessions. Pages are cached in a small LRU keyed by
+# (filters, cursor), and the page after the one just served is fetched in the background.
+class HistoryPager:
+    def __init__(self, page_size=HISTORY_PAGE_SIZE, max_pages=HISTORY_CACHE_PAGES, ttl=HISTORY_CACHE_TTL):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self._pages = OrderedDict()  # (filters, cursor) -> (expires_at, rows, next_cursor)
+        self._loading = {}           # (filters, cursor) -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-prefetch")
+        self._stats = {"hits": 0, "misses": 0, "prefetched": 0, "evicted": 0}
+
+    def _load(self, key):
+        filters, cursor = key
+        shift, start, end = filters
+        try:
+            rows = get_backend().page(shift, start, end, after=cursor, limit=self.page_size)
+            next_cursor = (rows[-1][1], rows[-1][0]) if len(rows) == self.page_size else None
+            with self._lock:
+                self._pages[key] = (time.monotonic() + self.ttl, rows, next_cursor)
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+                    self._stats["evicted"] += 1
+            return rows, next_cursor
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    # Start loading a page unless it is cached or already on its way; caller holds the lock
+    def _schedule(self, key):
+        entry = self._pages.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return None
+        future = self._loading.get(key)
+        if future is None:
+            future = self._loading[key] = self._executor.submit(self._load, key)
+        return future
+
+    # Rows of the page starting after `cursor` (None for the newest page) and the cursor of the next page
+    def get_page(self, filters, cursor=None):
+        key = (filters, cursor)
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._pages.move_to_end(key)
+                self._stats["hits"] += 1
+                future = None
+            else:
+                self._stats["misses"] += 1
+                future = self._schedule(key)
+        if future is not None:
+            rows, next_cursor = future.result()
+        else:
+            rows, next_cursor = entry[1], entry[2]
+        if next_cursor is not None:
+            with self._lock:
+                if self._schedule((filters, next_cursor)) is not None:
+                    self._stats["prefetched"] += 1
+        return rows, next_cursor
+
+    # New or rescanned rows land on the newest pages; older pages age out through the TTL
+    def invalidate_newest(self):
+        with self._lock:
+            for key in [key for key in self._pages if key[1] is None]:
+                del self._pages[key]
+
+    def metrics(self):
+        with self._lock:
+            return {"pages": len(self._pages), "loading": len(self._loading), **self._stats}
+
+
+# Versions of one record, newest first, as (time, shift, data_1, ..., data_5, changed), where
+# `changed` names the columns that differ from the version before. The newest is the stored
+# row; older ones are rebuilt by putting back, change by change, the values each upsert replaced.
+def record_timeline(data_1, limit=TIMELINE_LIMIT):
+    backend = get_backend()
+    rows = backend.lookup([data_1])
+    if not rows:
+        return []
+    version = list(rows[0][1:])
+    timeline = []
+    for changed, *old in backend.record_changes(data_1, limit - 1):
+        columns = [column for column in CHANGE_COLUMNS if changed & CHANGE_BITS[column]]
+        timeline.append((*version, ", ".join(columns)))
+        for column in columns:
+            version[VERSION_POSITIONS[column]] = old[CHANGE_COLUMNS.index(column)]
+    timeline.append((*version, ""))
+    return timeline
+
+
+@st.cache_resource
+def get_history_pager():
+    pager = HistoryPager()
+    get_write_queue().add_listener(lambda rows: pager.invalidate_newest())
+    return pager
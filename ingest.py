@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import streamlit as st
+
+from metrics import REGISTRY, span
+from validation import InvalidRecord
+from write_queue import QueueFull, get_write_queue
+
+# HTTP ingest for machines (PLC gateways, scripts) next to the Streamlit apps, e.g.
+#   SPOOL_PATH=ingest_spool.db python ingest.py --port 8600
+# Run it with its own SPOOL_PATH: a spool belongs to one process.
+INGEST_HOST = os.getenv("INGEST_HOST", "0.0.0.0")
+INGEST_PORT = int(os.getenv("INGEST_PORT", "8600"))
+# Shared secret; when set, requests must send "Authorization: Bearer <token>"
+INGEST_TOKEN = os.getenv("INGEST_TOKEN", "")
+INGEST_MAX_BODY = int(os.getenv("INGEST_MAX_BODY", str(8 * 1024 * 1024)))  # bytes per request
+INGEST_MAX_RECORDS = int(os.getenv("INGEST_MAX_RECORDS", "10000"))          # records per batch request
+# Single-record requests that arrive while a spool commit is running share the next one
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "500"))
+INGEST_RETRY_AFTER = int(os.getenv("INGEST_RETRY_AFTER", "1"))   # seconds suggested with a 429
+INGEST_WAIT_TIMEOUT = float(os.getenv("INGEST_WAIT_TIMEOUT", "10"))  # longest ?wait=1 holds a request
+
+FIELDS = ("data_1", "data_2", "data_3", "data_4", "data_5")
+
+
+# A request the server cannot take as it is; `status` is the HTTP status to answer with
+class BadRequest(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# A record is {"data_1": ..., ..., "data_5": ..., "time": optional ISO 8601}. Times with an
+# offset are turned into this host's local time, the clock user_data is written in.
+# Returns ([data_1, ..., data_5], time or None).
+def parse_record(record):
+    if not isinstance(record, dict):
+        raise BadRequest("a record must be a JSON object")
+    written_at = record.get("time")
+    if written_at is not None:
+        try:
+            written_at = datetime.fromisoformat(written_at)
+        except (TypeError, ValueError):
+            raise InvalidRecord("unreadable time") from None
+        if written_at.tzinfo is not None:
+            try:
+                written_at = written_at.astimezone().replace(tzinfo=None)
+            except OverflowError:
+                raise InvalidRecord("time out of range") from None
+    return [record.get(field) for field in FIELDS], written_at
+
+
+# Records of a batch body: a JSON array, or NDJSON (one object per line)
+def parse_batch(body, content_type):
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        records = []
+        for number, line in enumerate(body.splitlines(), start=1):
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    raise BadRequest(f"line {number}: {e}") from None
+        return records
+    try:
+        records = json.loads(body)
+    except ValueError as e:
+        raise BadRequest(str(e)) from None
+    if not isinstance(records, list):
+        raise BadRequest("expected a JSON array of records")
+    return records
+
+
+# Group commit for single-record requests: every request waiting when the spool is free goes
+# into the same add_or_update_many call, so N concurrent clients cost one validation pass
+# and one fsync instead of N. Under light load a record is committed on its own at once.
+class IngestBatcher:
+    def __init__(self, max_records=INGEST_BATCH):
+        self.max_records = max(max_records, 1)
+        self._pending = []  # (values, time, Future)
+        self._cond = threading.Condition()
+        self._stats = {"records": 0, "commits": 0, "largest_commit": 0}
+        self._thread = threading.Thread(target=self._run, name="ingest-batcher", daemon=True)
+        self._thread.start()
+
+    # Future resolving to the record's WriteTicket, or failing with InvalidRecord or QueueFull
+    def submit(self, values, written_at=None):
+        future = Future()
+        with self._cond:
+            self._pending.append((values, written_at, future))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        from mc1.data import add_or_update_many
+
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending[:self.max_records], self._pending[self.max_records:]
+            try:
+                tickets, rejects = add_or_update_many([values for values, _, _ in batch],
+                                                      times=[written_at for _, written_at, _ in batch],
+                                                      double_scans=False)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            rejected = dict(rejects)
+            tickets = iter(tickets)
+            for index, (_, _, future) in enumerate(batch):
+                if index in rejected:
+                    future.set_exception(InvalidRecord(rejected[index]))
+                else:
+                    future.set_result(next(tickets))
+            with self._cond:
+                self._stats["records"] += len(batch)
+                self._stats["commits"] += 1
+                self._stats["largest_commit"] = max(self._stats["largest_commit"], len(batch))
+
+    def metrics(self):
+        with self._cond:
+            return {"pending": len(self._pending), **self._stats}
+
+
+@st.cache_resource
+def get_batcher():
+    return IngestBatcher()
+
+
+# Wait for tickets to be committed; returns the number still pending at the deadline
+def wait_tickets(tickets, timeout=INGEST_WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    for ticket in tickets:
+        if not ticket.wait(max(deadline - time.monotonic(), 0)):
+            return sum(not ticket.done() for ticket in tickets)
+    return 0
+
+
+# HTTP/1.1, so gateways keep one connection open for many requests. Every response carries a
+# Content-Length; anything that cannot be answered cleanly closes the connection.
+#   POST /record           one JSON record              202 queued (200 with ?wait=1), 422 invalid
+#   POST /records          JSON array or NDJSON batch   202 with per-record rejects
+#   GET  /health           write queue and batcher state
+#   GET  /metrics          Prometheus text
+# 429 with Retry-After when the write queue is full: nothing of that request was queued.
+class IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "mc1-ingest"
+
+    def _reply(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            raise BadRequest("Content-Length is required", status=411)
+        length = int(length)
+        if length > INGEST_MAX_BODY:
+            # The body is never read, so the connection cannot be reused
+            self.close_connection = True
+            raise BadRequest(f"body over {INGEST_MAX_BODY} bytes", status=413)
+        return self.rfile.read(length)
+
+    def _authorized(self):
+        if INGEST_TOKEN and self.headers.get("Authorization") != f"Bearer {INGEST_TOKEN}":
+            self.close_connection = True
+            self._reply(401, {"error": "missing or wrong bearer token"}, [("WWW-Authenticate", "Bearer")])
+            return False
+        return True
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._reply(200, {"status": "ok", "write_queue": get_write_queue().metrics(), "batcher": get_batcher().metrics()})
+        elif path == "/metrics":
+            body = REGISTRY.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ("/record", "/records"):
+            # The body is left unread
+            self.close_connection = True
+            self._reply(404, {"error": "not found"})
+            return
+        if not self._authorized():
+            return
+        wait = parse_qs(url.query).get("wait", ["0"])[0] == "1"
+        with span("ingest_request", endpoint=url.path):
+            try:
+                body = self._body()
+                if url.path == "/record":
+                    self._post_record(body, wait)
+                else:
+                    self._post_records(body, self.headers.get_content_type(), wait)
+            except BadRequest as e:
+                self._reply(e.status, {"error": str(e)})
+            except QueueFull as e:
+                self._reply(429, {"error": str(e)}, [("Retry-After", str(INGEST_RETRY_AFTER))])
+            except Exception as e:
+                self.close_connection = True
+                self._reply(500, {"error": str(e)})
+
+    def _post_record(self, body, wait):
+        try:
+            values, written_at = parse_record(json.loads(body))
+            ticket = get_batcher().submit(values, written_at).result()
+        except ValueError as e:
+            if isinstance(e, InvalidRecord):
+                self._reply(422, {"error": str(e)})
+                return
+            raise BadRequest(str(e)) from None
+        if wait:
+            if wait_tickets([ticket]):
+                self._reply(504, {"status": "pending", "error": "not written yet; it stays queued"})
+            else:
+                self._reply(200 if ticket.error is None else 422, {"status": ticket.status, "error": ticket.error})
+        else:
+            self._reply(202, {"status": "queued"})
+
+    def _post_records(self, body, content_type, wait):
+        from mc1.data import add_or_update_many
+
+        records = parse_batch(body, content_type)
+        # A batch bigger than the whole write queue would get a 429 forever
+        limit = min(INGEST_MAX_RECORDS, get_write_queue().max_pending)
+        if len(records) > limit:
+            raise BadRequest(f"more than {limit} records; split the batch", status=413)
+        values, times, rejects, positions = [], [], [], []
+        for index, record in enumerate(records):
+            try:
+                record_values, written_at = parse_record(record)
+            except (BadRequest, InvalidRecord) as e:
+                rejects.append({"index": index, "error": str(e)})
+                continue
+            values.append(record_values)
+            times.append(written_at)
+            positions.append(index)
+        tickets, invalid = add_or_update_many(values, times=times, double_scans=False) if values else ([], [])
+        rejects += [{"index": positions[index], "error": reason} for index, reason in invalid]
+        rejects.sort(key=lambda reject: reject["index"])
+        payload = {"accepted": len(tickets), "rejected": rejects}
+        if wait:
+            pending = wait_tickets(tickets)
+            payload["failed"] = sum(ticket.error is not None for ticket in tickets if ticket.done())
+            payload["pending"] = pending
+            self._reply(504 if pending else 200, payload)
+        else:
+            self._reply(202, payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Gateways reconnecting after a restart should not wait for TIME_WAIT sockets
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def main(argv=None):
+    from backends import get_backend
+
+    parser = argparse.ArgumentParser(description="HTTP ingest for MC1 records.")
+    parser.add_argument("--host", default=INGEST_HOST)
+    parser.add_argument("--port", type=int, default=INGEST_PORT)
+    args = parser.parse_args(argv)
+    get_backend().ensure_schema()
+    queue = get_write_queue()
+    server = IngestServer((args.host, args.port), IngestHandler)
+    print(f"ingest listening on {args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        # Whatever is not written in time stays in the spool for the next start
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
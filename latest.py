@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from metrics import span
+from queries import LATEST_LIMIT, get_changes, get_latest_snapshot
+from reads import get_read_executor
+
+# Changed rows merged per refresh; a bigger backlog reloads the panel instead
+LATEST_MAX_DELTA = int(os.getenv("LATEST_MAX_DELTA", "500"))
+
+
+# Per-session Latest Data panel. The first refresh loads the newest rows; later refreshes
+# only fetch rows whose rowversion moved past the watermark (one shared query per watermark)
+# and merge them into the frame.
+# Refreshes run on the read executor; until one lands, `frame` is the previous result.
+class LatestView:
+    def __init__(self, shift, columns, limit=LATEST_LIMIT):
+        self.shift = shift
+        self.columns = list(columns)
+        self.limit = limit
+        self.frame = None
+        self.watermark = None
+        self.future = None
+        self.started_at = None
+        self.error = None
+        # An abandoned refresh may still be running when the next one starts
+        self._lock = threading.Lock()
+        self.stats = {"full_loads": 0, "delta_refreshes": 0, "empty_refreshes": 0, "rows_merged": 0}
+
+    @property
+    def refreshing(self):
+        return self.future is not None
+
+    # Queue a refresh unless one is already on its way
+    def start_refresh(self, prepare=None):
+        if self.future is None:
+            self.started_at = time.monotonic()
+            self.future = get_read_executor().submit("latest", self._prepared_refresh, prepare)
+        return self.future
+
+    def _prepared_refresh(self, prepare):
+        if prepare is not None:
+            prepare()
+        return self.refresh()
+
+    # Wait up to `timeout` seconds for the refresh in flight. True once it has finished (an
+    # error is kept in `error` and `frame` stays as it was), False while it is still running.
+    def wait(self, timeout):
+        if self.future is None:
+            return True
+        try:
+            self.future.result(timeout)
+        except FutureTimeout:
+            return False
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+        else:
+            self.error = None
+        self.future = None
+        return True
+
+    # Give up on the refresh in flight and keep showing the previous frame
+    def abandon(self):
+        if self.future is not None:
+            get_read_executor().abandon(self.future)
+            self.error = f"no answer after {time.monotonic() - self.started_at:.1f} s"
+            self.future = None
+
+    def _load(self):
+        # pandas costs about half a second to import; only pay for it once a table is rendered
+        import pandas as pd
+        self.watermark, rows = get_latest_snapshot(self.shift, self.limit)
+        with span("dataframe_build", view="latest"):
+            self.frame = pd.DataFrame(rows, columns=self.columns)
+        self.stats["full_loads"] += 1
+        return self.frame
+
+    def refresh(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        if self.frame is None:
+            return self._load()
+        watermark, changes = get_changes(self.watermark, LATEST_MAX_DELTA + 1)
+        if len(changes) > LATEST_MAX_DELTA:
+            return self._load()
+        self.watermark = watermark
+        if not changes:
+            # Nothing changed: hand back the same frame, no query result to build
+            self.stats["empty_refreshes"] += 1
+            return self.frame
+
+        import pandas as pd
+        key, time_column, shift_column = self.columns[3], self.columns[1], self.columns[2]
+        with span("dataframe_build", view="latest_delta"):
+            delta = pd.DataFrame(changes, columns=self.columns).drop_duplicates(subset=key, keep="last")
+        # A rescanned row may have moved to another shift, so drop every changed key first
+        kept = self.frame[~self.frame[key].isin(delta[key])]
+        if self.shift != "All":
+            delta = delta[delta[shift_column] == self.shift]
+        if len(kept) + len(delta) < self.limit and len(self.frame) == self.limit:
+            # A row left the window and the delta cannot say what slides in behind it
+            return self._load()
+        frame = pd.concat([delta, kept], ignore_index=True) if len(kept) else delta
+        self.frame = frame.sort_values(time_column, ascending=False, kind="stable").head(self.limit).reset_index(drop=True)
+        self.stats["delta_refreshes"] += 1
+        self.stats["rows_merged"] += len(delta)
+        return self.frame
@@ -0,0 +1,2 @@
+# Program MC1: the data-entry screen shared by app.py, app2.py and app3.py.
+# Keep this module free of heavy imports; kiosks pay for them on every restart.
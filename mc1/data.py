@@ -0,0 +1,100 @@
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from backends import get_backend
+from reads import READ_TIMEOUT, ReadError
+from shifts import get_shift, get_shift_calendar
+from validation import InvalidRecord, check_time, get_validator
+from watcher import get_change_watcher
+from write_queue import get_write_queue
+
+
+# Bring the schema up to date once per process; sessions and reruns reuse the result
+@st.cache_resource
+def init_db():
+    return get_backend().ensure_schema()
+
+
+# Normalize and check one record against the validation rules. `recent` holds
+# (data_1, submitted_at) for this session's latest submits: the same data_1 again within the
+# duplicate window is a double scan.
+# Returns the normalized values or raises InvalidRecord.
+def validate(values, recent=(), validator=None):
+    validator = validator or get_validator()
+    values, reason = validator.validate_record(values)
+    if reason is None and validator.duplicate_window:
+        cutoff = time.time() - validator.duplicate_window
+        if any(data_1 == values[0] and submitted_at >= cutoff for data_1, submitted_at in recent):
+            reason = f"{values[0]} was just submitted (duplicate scan)"
+    if reason:
+        raise InvalidRecord(reason)
+    return values
+
+
+# Validate the row, queue it for the write-behind worker and return its ticket immediately
+def add_or_update_data(data_1, data_2, data_3, data_4, data_5, recent=()):
+    values = validate([data_1, data_2, data_3, data_4, data_5], recent)
+    current_time = datetime.now()
+    shift = get_shift(current_time)
+    return get_write_queue().submit((current_time, shift, *values))
+
+
+# Validate several records ([data_1, ..., data_5] each) and queue the good ones in one spool
+# transaction. Returns (tickets, rejects) with rejects as (index in records, reason).
+# `times` can give records their own time (None for "now"), e.g. readings a gateway buffered.
+# Machine writers pass double_scans=False: a repeated data_1 from them is a real rewrite.
+def add_or_update_many(records, recent=(), times=None, double_scans=True):
+    validator = get_validator()
+    calendar = get_shift_calendar()
+    double_scans = double_scans and validator.duplicate_window
+    rows, rejects, burst = [], [], set()
+    current_time = datetime.now()
+    shift = calendar.shift_at(current_time)
+    for index, record in enumerate(records):
+        try:
+            values = validate(record, recent if double_scans else (), validator)
+            # A repeat inside the same burst counts as a double scan too
+            if double_scans and values[0] in burst:
+                raise InvalidRecord(f"{values[0]} was just submitted (duplicate scan)")
+            written_at = times[index] if times is not None else None
+            if written_at is not None:
+                check_time(written_at)
+        except InvalidRecord as e:
+            rejects.append((index, str(e)))
+            continue
+        burst.add(values[0])
+        if written_at is None:
+            rows.append((current_time, shift, *values))
+        else:
+            rows.append((written_at, calendar.shift_at(written_at), *values))
+    tickets = get_write_queue().submit_many(rows) if rows else []
+    return tickets, rejects
+
+
+# Latest rows for the selected shift, kept per session: the first refresh loads them,
+# later ones only fetch rows changed since the last rowversion watermark and merge them in.
+# In live mode it only queries when the change watcher has seen user_data move.
+# Returns the view at once; the refresh runs on the read executor, after `prepare()` if given.
+def start_latest_read(shift_option, columns, live=False, prepare=None):
+    from latest import LatestView
+
+    view = st.session_state.get("latest_view")
+    if view is None or view.shift != shift_option or view.columns != list(columns):
+        view = st.session_state["latest_view"] = LatestView(shift_option, columns)
+    version = get_change_watcher().version
+    if view.frame is None or not live or st.session_state.get("latest_version") != version:
+        st.session_state["latest_version"] = version
+        view.start_refresh(prepare)
+    return view
+
+
+# Blocking version for callers that just want the rows
+def get_data(shift_option, columns, live=False):
+    view = start_latest_read(shift_option, columns, live)
+    if not view.wait(READ_TIMEOUT):
+        view.abandon()
+    if view.frame is None:
+        raise ReadError(view.error)
+    return view.frame
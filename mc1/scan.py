@@ -0,0 +1,43 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Scan mode for stations that fill data_1..data_5 with a keyboard-wedge scanner. Each scan
+# ends with Enter or Tab; a label holding several values separates them with SCAN_DELIMITER.
+# With SCAN_PREFIXES (comma-separated, one per field, e.g. "D1:,D2:,D3:,D4:,D5:") every scan
+# names its own field and fields can arrive in any order.
+SCAN_MODE = os.getenv("SCAN_MODE", "0") == "1"
+SCAN_DELIMITER = os.getenv("SCAN_DELIMITER", "|")
+SCAN_PREFIXES = [prefix for prefix in os.getenv("SCAN_PREFIXES", "").split(",") if prefix]
+# Complete records held in the browser before they are sent together; a partial batch is
+# sent after SCAN_BATCH_WAIT seconds without a new record
+SCAN_BATCH = int(os.getenv("SCAN_BATCH", "1"))
+SCAN_BATCH_WAIT = float(os.getenv("SCAN_BATCH_WAIT", "1"))
+
+_component = components.declare_component("mc1_scan", path=os.path.join(os.path.dirname(__file__), "scan_frontend"))
+
+
+# Draw the scanner capture box; returns the records not acknowledged yet, as [data_1, ...,
+# data_5] lists. Fields are collected in the browser, so a whole record costs one rerun
+# instead of one per field. The browser keeps the records until ack_scans() is called.
+def scan_input(labels, key="scan"):
+    acked = st.session_state.setdefault(f"{key}_acked", {"session": None, "last": 0})
+    value = _component(fields=len(labels), labels=list(labels), delimiter=SCAN_DELIMITER, prefixes=SCAN_PREFIXES,
+                       batch=max(SCAN_BATCH, 1), batch_wait_ms=int(SCAN_BATCH_WAIT * 1000),
+                       acked=acked, key=key, default=None)
+    if not value or not value.get("records"):
+        return []
+    if value["session"] != acked["session"]:
+        # The browser reloaded the component and numbers its records from 1 again
+        acked = st.session_state[f"{key}_acked"] = {"session": value["session"], "last": 0}
+    records = [record["fields"] for record in value["records"] if record["id"] > acked["last"]]
+    st.session_state[f"{key}_offered"] = max(record["id"] for record in value["records"])
+    return records
+
+
+# Acknowledge the records scan_input() last returned, once the app has accepted them. Until
+# then they come back from every scan_input() call, so a failed submit is retried.
+def ack_scans(key="scan"):
+    acked = st.session_state[f"{key}_acked"]
+    acked["last"] = max(acked["last"], st.session_state.pop(f"{key}_offered", 0))
@@ -0,0 +1,34 @@
+import os
+import threading
+import time
+
+
+# perf_counter() value at which this process was created (read from /proc on Linux), so
+# marks include interpreter and Streamlit boot. Elsewhere, the time this module was imported.
+def _process_started():
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.perf_counter() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter()
+
+
+STARTED_AT = _process_started()
+
+_marks = {}
+_lock = threading.Lock()
+
+
+# Record the milliseconds from process start to `name` the first time it is reached
+def mark(name):
+    with _lock:
+        if name not in _marks:
+            _marks[name] = round((time.perf_counter() - STARTED_AT) * 1000, 1)
+
+
+def timings():
+    with _lock:
+        return dict(_marks)
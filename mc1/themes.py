@@ -0,0 +1,401 @@
+import os
+
+# Looks of the Program MC1 screens. A theme is the page CSS plus the icons and texts that
+# differ between kiosks; register_theme adds another one without touching the UI code.
+CLASSIC_CSS = """
+<style>
+.stTextInput > div > input {
+    border-radius: 10px;
+    padding: 10px;
+    border: 2px solid #4CAF50;
+    width: 100%;
+    margin: 0;
+    margin-top: 0px;
+}
+.stButton > button {
+    background-color: #FF4B4B;
+    color: white;
+    border-radius: 10px;
+    padding: 10px 20px;
+    border: none;
+    font-size: 16px;
+    cursor: pointer;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    margin-top: 10px;
+}
+.stButton > button:hover {
+    background-color: #e04343;
+}
+.title {
+    text-align: center;
+    font-size: 36px;
+    color: #4CAF50;
+    margin-bottom: 20px;
+}
+.subheader {
+    font-size: 24px;
+    color: #333;
+    display: flex;
+    align-items: center;
+    gap: 10px;
+    margin-bottom: 0;
+}
+.table-container {
+    border: 1px solid #ddd;
+    border-radius: 10px;
+    padding: 10px;
+    height: 400px;
+    overflow-y: auto;
+    margin-top: 0;
+}
+.input-container {
+    display: flex;
+    align-items: center;
+    gap: 10px;
+    margin-bottom: -50px;
+    margin-top: -5px;
+    padding: 0;
+}
+.input-label {
+    font-size: 16px;
+    color: #333;
+    margin: 0;
+}
+.icon {
+    font-size: 20px;
+}
+.dataframe td, .dataframe th {
+    text-align: center !important;
+}
+.stSelectbox > div > select {
+    border-radius: 10px;
+    padding: 8px;
+    border: 2px solid #4CAF50;
+    width: 150px;
+}
+</style>
+"""
+
+GRADIENT_CSS = """
+<style>
+/* General layout */
+.stApp {
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    font-family: 'Arial', sans-serif;
+}
+
+/* Title */
+.title {
+    text-align: center;
+    font-size: 40px;
+    font-weight: bold;
+    color: #ffffff;
+    background: linear-gradient(90deg, #4CAF50, #2196F3);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    margin-bottom: 30px;
+    padding: 10px;
+    text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.1);
+}
+
+/* Subheader */
+.subheader {
+    font-size: 26px;
+    font-weight: 600;
+    color: #2c3e50;
+    display: flex;
+    align-items: center;
+    gap: 12px;
+    margin-bottom: 15px;
+    border-bottom: 2px solid #4CAF50;
+    padding-bottom: 5px;
+}
+
+/* Input fields */
+.stTextInput > div > input {
+    border-radius: 12px;
+    padding: 12px;
+    border: 2px solid #4CAF50;
+    background-color: #ffffff;
+    box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
+    transition: border-color 0.3s ease;
+    width: 100%;
+    margin-top: 5px;
+}
+.stTextInput > div > input:focus {
+    border-color: #2196F3;
+    outline: none;
+    box-shadow: 0 0 8px rgba(33, 150, 243, 0.3);
+}
+
+/* Buttons */
+.stButton > button {
+    background: linear-gradient(90deg, #4CAF50, #66BB6A);
+    color: white;
+    border-radius: 12px;
+    padding: 12px 25px;
+    border: none;
+    font-size: 16px;
+    font-weight: bold;
+    cursor: pointer;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    box-shadow: 0 3px 6px rgba(0, 0, 0, 0.1);
+    transition: all 0.3s ease;
+}
+.stButton > button:hover {
+    background: linear-gradient(90deg, #45a049, #5cb85c);
+    transform: translateY(-2px);
+    box-shadow: 0 5px 10px rgba(0, 0, 0, 0.15);
+}
+.stButton > button:nth-child(2) {
+    background: linear-gradient(90deg, #FF4B4B, #F06292);
+}
+.stButton > button:nth-child(2):hover {
+    background: linear-gradient(90deg, #e04343, #ec407a);
+}
+
+/* Input container */
+.input-container {
+    display: flex;
+    align-items: center;
+    gap: 10px;
+    margin-bottom: 10px;
+}
+.input-label {
+    font-size: 16px;
+    color: #34495e;
+    font-weight: 500;
+}
+.icon {
+    font-size: 22px;
+}
+
+/* Table container */
+.table-container {
+    border: 1px solid #e0e0e0;
+    border-radius: 12px;
+    padding: 15px;
+    background-color: #ffffff;
+    box-shadow: 0 4px 10px rgba(0, 0, 0, 0.05);
+    height: 450px;
+    overflow-y: auto;
+}
+.dataframe td, .dataframe th {
+    text-align: center !important;
+    font-size: 14px;
+    padding: 10px !important;
+}
+.dataframe th {
+    background-color: #4CAF50;
+    color: white;
+    font-weight: bold;
+}
+
+/* Selectbox */
+.stSelectbox > div > div {
+    border-radius: 12px;
+    border: 2px solid #4CAF50;
+    background-color: #ffffff;
+    padding: 8px;
+    box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
+    transition: border-color 0.3s ease;
+}
+.stSelectbox > div > div:hover {
+    border-color: #2196F3;
+}
+</style>
+"""
+
+CLEAN_CSS = """
+<style>
+/* General layout */
+.stApp {
+    background-color: #f8fafc;
+    font-family: 'Arial', sans-serif;
+}
+
+/* Title */
+.title {
+    text-align: center;
+    font-size: 36px;
+    font-weight: bold;
+    color: #1e40af;
+    margin-bottom: 25px;
+    padding: 10px;
+}
+
+/* Subheader */
+.subheader {
+    font-size: 24px;
+    font-weight: 600;
+    color: #1f2937;
+    display: flex;
+    align-items: center;
+    gap: 10px;
+    margin-bottom: 15px;
+}
+
+/* Input fields */
+.stTextInput > div > input {
+    border-radius: 8px;
+    padding: 10px;
+    border: 1px solid #d1d5db;
+    background-color: #ffffff;
+    width: 100%;
+    margin-top: 5px;
+    font-size: 14px;
+}
+.stTextInput > div > input:focus {
+    border-color: #3b82f6;
+    outline: none;
+}
+
+/* Buttons */
+.stButton > button {
+    background-color: #3b82f6;
+    color: white;
+    border-radius: 8px;
+    padding: 10px 20px;
+    border: none;
+    font-size: 14px;
+    font-weight: 500;
+    cursor: pointer;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    transition: background-color 0.2s ease;
+}
+.stButton > button:hover {
+    background-color: #2563eb;
+}
+.stButton > button:nth-child(2) {
+    background-color: #6b7280;
+}
+.stButton > button:nth-child(2):hover {
+    background-color: #4b5563;
+}
+
+/* Input container */
+.input-container {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    margin-bottom: 10px;
+}
+.input-label {
+    font-size: 14px;
+    color: #374151;
+    font-weight: 500;
+}
+.icon {
+    font-size: 18px;
+}
+
+/* Table container */
+.table-container {
+    border: 1px solid #e5e7eb;
+    border-radius: 8px;
+    padding: 10px;
+    background-color: #ffffff;
+    height: 400px;
+    overflow-y: auto;
+}
+.dataframe td, .dataframe th {
+    text-align: center !important;
+    font-size: 13px;
+    padding: 8px !important;
+}
+.dataframe th {
+    background-color: #e5e7eb;
+    color: #1f2937;
+    font-weight: 600;
+}
+
+/* Selectbox */
+.stSelectbox > div > div {
+    border-radius: 8px;
+    border: 1px solid #d1d5db;
+    background-color: #ffffff;
+    padding: 8px;
+    font-size: 14px;
+}
+.stSelectbox > div > div:hover {
+    border-color: #3b82f6;
+}
+</style>
+"""
+
+# classic: app.py, gradient: app2.py, clean: app3.py
+THEMES = {
+    "classic": {
+        "css": CLASSIC_CSS,
+        "columns": ["no", "time", "shift", "data_1", "data_2", "data_3", "data_4", "data_5"],
+        "field_label": "data_{}",
+        "input_icon": "📝",
+        "latest_icon": "📊",
+        "shift_label": "Select Shift",
+        "submit_label": "Submit  📤",
+        "clear_label": "Clear Data  🗑️",
+        "saved": ("Data processed successfully! ✅", None),
+        "missing": ("Please fill in all fields. ⚠️", None),
+        "invalid": ("Invalid data, please check and try again. ⚠️", None),
+        "busy": ("Database is busy, please try again. ⚠️", None),
+        "cleared": ("Input fields cleared! 🧹", None),
+        "no_data": ("info", "No data available yet. 📉", None),
+        "table_height": "auto",
+        "gap": "small",
+    },
+    "gradient": {
+        "css": GRADIENT_CSS,
+        "columns": ["No", "Time", "Shift", "Data 1", "Data 2", "Data 3", "Data 4", "Data 5"],
+        "field_label": "Data {}",
+        "input_icon": "📝",
+        "latest_icon": "📊",
+        "shift_label": "Filter by Shift",
+        "submit_label": "Submit  📤",
+        "clear_label": "Clear  🗑️",
+        "saved": ("Data processed successfully! ✅", "✅"),
+        "missing": ("Please fill in all fields! ⚠️", "⚠️"),
+        "invalid": ("Invalid data, please check! ⚠️", "⚠️"),
+        "busy": ("Database is busy, please try again.", "⚠️"),
+        "cleared": ("Input fields cleared! 🧹", "🧹"),
+        "no_data": ("warning", "No data available yet! 📉", "📉"),
+        "table_height": 400,
+        "gap": "medium",
+    },
+    "clean": {
+        "css": CLEAN_CSS,
+        "columns": ["No", "Time", "Shift", "Data 1", "Data 2", "Data 3", "Data 4", "Data 5"],
+        "field_label": "Data {}",
+        "input_icon": "✍️",
+        "latest_icon": "📋",
+        "shift_label": "Filter by Shift",
+        "submit_label": "Submit  ✓",
+        "clear_label": "Clear  ✗",
+        "saved": ("Data saved successfully!", "✔️"),
+        "missing": ("Please fill in all fields.", "⚠️"),
+        "invalid": ("Invalid data.", "⚠️"),
+        "busy": ("Database is busy, please try again.", "⚠️"),
+        "cleared": ("Fields cleared.", "ℹ️"),
+        "no_data": ("info", "No data available.", "ℹ️"),
+        "table_height": 350,
+        "gap": "medium",
+    },
+}
+# Theme used when an entry point does not name one
+DEFAULT_THEME = os.getenv("MC1_THEME", "gradient")
+
+
+def register_theme(name, theme, base=DEFAULT_THEME):
+    THEMES[name] = {**THEMES[base], **theme}
+
+
+def get_theme(name=None):
+    name = name or DEFAULT_THEME
+    if name not in THEMES:
+        raise ValueError(f"unknown theme {name!r}; known themes: {', '.join(THEMES)}")
+    return THEMES[name]
@@ -0,0 +1,257 @@
+import time
+
+import streamlit as st
+
+from mc1 import startup
+from mc1.data import add_or_update_data, add_or_update_many, init_db, start_latest_read
+from mc1.scan import SCAN_MODE, ack_scans, scan_input
+from mc1.themes import get_theme
+from metrics import PROFILE_RERUNS, PROFILE_THRESHOLD, rerun, span, start_exporters
+from queries import get_shift_options
+from reads import READ_TIMEOUT, READ_WAIT
+from validation import InvalidRecord
+from watcher import WATCH_INTERVAL, get_change_watcher
+from write_queue import QueueFull, get_write_queue
+
+# Number of recent submits whose save status is shown per session
+MAX_TICKETS = 5
+# Seconds between checks while a Latest Data refresh is running
+READ_POLL = 0.1
+FIELD_ICONS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
+
+
+# (data_1, submitted_at) of this session's latest submits, for the duplicate scan check
+def recent_submits():
+    return [(ticket.data_1, ticket.submitted_at) for ticket in st.session_state.get("tickets", [])]
+
+
+# Update form submission
+def update_form():
+    values = [st.session_state[f"data_{n}"] for n in range(1, 6)]
+    st.session_state["submit_error"] = None
+    st.session_state["invalid_reason"] = None
+    st.session_state["form_submitted"] = False
+    if all(values):
+        try:
+            ticket = add_or_update_data(*values, recent=recent_submits())
+        except InvalidRecord as e:
+            # The form keeps its values so the operator can correct them
+            st.session_state["invalid_reason"] = str(e)
+            return
+        except QueueFull as e:
+            st.session_state["submit_error"] = str(e)
+            return
+        st.session_state["tickets"] = (st.session_state.get("tickets", []) + [ticket])[-MAX_TICKETS:]
+        st.session_state["form_submitted"] = True
+        clear_form()
+
+
+# Clear form inputs
+def clear_form():
+    for n in range(1, 6):
+        st.session_state[f"data_{n}"] = ""
+
+
+# Show whether the latest submits have reached the database (refreshed every second)
+@st.fragment(run_every=1)
+def show_write_status():
+    for ticket in reversed(st.session_state.get("tickets", [])):
+        if ticket.status == "persisted":
+            st.caption(f"✅ {ticket.data_1} persisted ({(ticket.persisted_at - ticket.submitted_at) * 1000:.0f} ms)")
+        elif ticket.status == "failed":
+            st.caption(f"❌ {ticket.data_1} failed: {ticket.error}")
+        else:
+            st.caption(f"⏳ {ticket.data_1} saving...")
+
+
+# Input Data panel (col1)
+def show_form(theme):
+    st.markdown(f'<div class="subheader"><span class="icon">{theme["input_icon"]}</span>Input Data</div>', unsafe_allow_html=True)
+    with st.form(key="data_form"):
+        for n, icon in enumerate(FIELD_ICONS, start=1):
+            label = theme["field_label"].format(n)
+            st.markdown(f'<div class="input-container"><span class="icon">{icon}</span><span class="input-label">{label}</span></div>', unsafe_allow_html=True)
+            st.text_input(label, placeholder=f"Enter {label}", key=f"data_{n}", label_visibility="hidden")
+
+        button_col1, button_col2 = st.columns(2)
+        with button_col1:
+            submit_button = st.form_submit_button(label=theme["submit_label"], on_click=update_form)
+        with button_col2:
+            clear_button = st.form_submit_button(label=theme["clear_label"], on_click=clear_form)
+
+    if submit_button:
+        if st.session_state.get("form_submitted"):
+            st.success(theme["saved"][0], icon=theme["saved"][1])
+        elif st.session_state.get("invalid_reason"):
+            st.error(f"{theme['invalid'][0]} ({st.session_state['invalid_reason']})", icon=theme["invalid"][1])
+        elif st.session_state.get("submit_error"):
+            st.error(f"{theme['busy'][0]} ({st.session_state['submit_error']})", icon=theme["busy"][1])
+        else:
+            st.error(theme["missing"][0], icon=theme["missing"][1])
+    if clear_button:
+        st.info(theme["cleared"][0], icon=theme["cleared"][1])
+    show_write_status()
+
+
+# Scan mode input panel (col1). A fragment, so a scanned record reruns only this panel.
+@st.fragment
+def show_scan(theme):
+    st.markdown(f'<div class="subheader"><span class="icon">{theme["input_icon"]}</span>Scan Data</div>', unsafe_allow_html=True)
+    records = scan_input([theme["field_label"].format(n) for n in range(1, 6)])
+    if records:
+        try:
+            tickets, rejects = add_or_update_many(records, recent=recent_submits())
+        except QueueFull as e:
+            # Not acknowledged: the browser keeps the records and sends them again
+            st.error(f"{theme['busy'][0]} ({e})", icon=theme["busy"][1])
+        else:
+            ack_scans()
+            st.session_state["tickets"] = (st.session_state.get("tickets", []) + tickets)[-MAX_TICKETS:]
+            if tickets:
+                st.success(f"{theme['saved'][0]} ({len(tickets)})", icon=theme["saved"][1])
+            for index, reason in rejects:
+                st.error(f"{theme['invalid'][0]} ({records[index][0]}: {reason})", icon=theme["invalid"][1])
+    show_write_status()
+
+
+# Latest Data panel (col2)
+def show_latest_data(theme, live):
+    with span("rerun", page="latest_data"):
+        render_latest_data(theme, live)
+
+
+# A fast refresh is drawn once. A slow one first draws the previous rows under a
+# "refreshing" line and swaps them out when the new rows land, or keeps them with a
+# warning after READ_TIMEOUT seconds.
+def render_latest_data(theme, live):
+    st.markdown(f'<div class="subheader"><span class="icon">{theme["latest_icon"]}</span>Latest Data</div>', unsafe_allow_html=True)
+    shift_option = st.selectbox(theme["shift_label"], ["All", *get_shift_options()], index=0, key="shift_select")
+    # A full rerun started this read before drawing the form (see render)
+    view = st.session_state.pop("latest_prefetch", None)
+    if view is None or view.shift != shift_option:
+        view = start_latest_read(shift_option, theme["columns"], live)
+    status, table = st.empty(), st.empty()
+    if not view.wait(READ_WAIT):
+        drawn = view.frame
+        if drawn is not None:
+            draw_latest_table(theme, table, drawn)
+        while not view.wait(READ_POLL):
+            elapsed = time.monotonic() - view.started_at
+            if elapsed >= READ_TIMEOUT:
+                view.abandon()
+                break
+            # Each redraw is also where a click elsewhere on the page can stop this run
+            status.caption(f"🔄 Refreshing... {elapsed:.1f} s")
+        status.empty()
+        if view.frame is drawn:
+            table = None
+    if view.error and view.frame is None:
+        status.error(f"Could not load the latest rows ({view.error})", icon="⚠️")
+    elif view.error:
+        status.warning(f"Showing the last rows that loaded ({view.error})", icon="⚠️")
+    if table is not None and view.frame is not None:
+        draw_latest_table(theme, table, view.frame)
+
+
+def draw_latest_table(theme, slot, df):
+    if not df.empty:
+        with span("render", element="dataframe"):
+            slot.dataframe(df, use_container_width=True, height=theme["table_height"])
+    else:
+        kind, text, icon = theme["no_data"]
+        getattr(slot, kind)(text, icon=icon)
+
+
+# Pool, write queue, cache, watcher and startup numbers for whoever looks after the kiosk
+def show_status():
+    from backends import get_backend
+    from backfill import get_shift_backfill
+    from bus import get_bus
+    from cache import get_result_cache
+    from reads import get_read_executor
+    from retention import get_retention_job
+    from shifts import get_calendar_source
+
+    # Storage backend: per-operation latency, plus the connection pool on SQL Server
+    with st.sidebar.expander("Backend"):
+        st.json(get_backend().metrics())
+    # Local spool status: rows waiting for the server and how fast they are being written
+    queue_metrics = get_write_queue().metrics()
+    st.sidebar.metric("Spool depth", queue_metrics["spool_depth"])
+    st.sidebar.metric("Replay rate", f"{queue_metrics['replay_rate']:.1f} rows/s")
+    with st.sidebar.expander("Write queue"):
+        st.json(queue_metrics)
+    with st.sidebar.expander("Reads"):
+        st.json(get_read_executor().metrics())
+    with st.sidebar.expander("Result cache"):
+        st.json(get_result_cache().metrics())
+    # Cache invalidations sent to and received from the other replicas
+    with st.sidebar.expander("Bus"):
+        st.json(get_bus().metrics())
+    with st.sidebar.expander("Change watcher"):
+        st.json(get_change_watcher().metrics())
+    # Rows moved from user_data into the archive table
+    retention = get_retention_job().metrics()
+    if retention["failing"]:
+        st.sidebar.error(f"Retention is failing: {retention['last_error']}")
+    with st.sidebar.expander("Retention"):
+        st.json(retention)
+    # Calendar in force, and recomputing stored shifts after it changed
+    with st.sidebar.expander("Shift calendar"):
+        st.json(get_calendar_source().metrics())
+        backfill = get_shift_backfill()
+        if st.button("Recompute shifts", help="Reassign the shift of every stored row with this calendar"):
+            backfill.start()
+        st.json(backfill.metrics())
+    # Milliseconds from process start; recorded once per process, so this is the cold start
+    with st.sidebar.expander("Startup"):
+        st.json(startup.timings())
+    st.sidebar.toggle(f"Profile reruns over {PROFILE_THRESHOLD:g} s", value=PROFILE_RERUNS, key="profile_reruns",
+                      help="Slow reruns are saved as cProfile stats; see the Metrics page")
+
+
+# The archive job needs the schema, so it starts after init_db() rather than with the exporters
+def start_retention():
+    from retention import get_retention_job
+
+    get_retention_job()
+
+
+# Main Streamlit UI, timed (and optionally profiled) as one rerun
+def main(theme_name=None):
+    startup.mark("script_started")
+    with rerun(theme_name or "app", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        render(theme_name)
+
+
+# The form is drawn before anything touches the database, so a freshly restarted kiosk
+# shows something to type into while the schema check and first query run.
+def render(theme_name=None):
+    theme = get_theme(theme_name)
+    st.set_page_config(page_title="Program MC1", layout="wide")
+    start_exporters()
+    st.markdown(theme["css"], unsafe_allow_html=True)
+    st.markdown('<div class="title">Program MC1</div>', unsafe_allow_html=True)
+
+    live = st.sidebar.toggle("Live updates", value=True, key="live_updates")
+    scan = st.sidebar.toggle("Scan mode", value=SCAN_MODE, key="scan_mode", help="Input from a barcode scanner")
+    # Start the Latest Data read now so it runs, after the schema check, while the form is drawn
+    st.session_state["latest_prefetch"] = start_latest_read(st.session_state.get("shift_select", "All"),
+                                                            theme["columns"], live, prepare=init_db)
+    col1, col2 = st.columns([1, 1], gap=theme["gap"])
+    with col1:
+        if scan:
+            show_scan(theme)
+        else:
+            show_form(theme)
+    startup.mark("first_paint")
+
+    init_db()
+    start_retention()
+    startup.mark("schema_ready")
+    with col2:
+        # Live mode reruns just this panel every WATCH_INTERVAL seconds
+        st.fragment(show_latest_data, run_every=WATCH_INTERVAL if live else None)(theme, live)
+    startup.mark("latest_data")
+
+    show_status()
@@ -0,0 +1,202 @@
+import cProfile
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+# Prometheus exporters, both off by default: a text file rewritten every METRICS_INTERVAL
+# seconds (for node_exporter's textfile collector) and/or an HTTP endpoint serving /metrics
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))
+# Reruns slower than PROFILE_THRESHOLD seconds are dumped as cProfile stats into PROFILE_DIR
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "0") == "1"
+PROFILE_THRESHOLD = float(os.getenv("PROFILE_THRESHOLD", "0.5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Upper bounds in seconds, from half a millisecond to ten seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Fixed-bucket latency histogram; observe() is a bisect and three additions under a lock
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    # Estimate the q-quantile by interpolating inside the bucket it falls in
+    def quantile(self, q, snapshot=None):
+        counts, _, count = snapshot or self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+# Process-wide set of histograms keyed by (name, labels)
+class Registry:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # [(name, labels, {"count", "sum_ms", "avg_ms", "p50_ms", "p95_ms", "p99_ms"})], optionally
+    # only the series whose name and labels match
+    def summary(self, name=None, **labels):
+        with self._lock:
+            items = sorted(self._histograms.items())
+        result = []
+        for (series, series_labels), histogram in items:
+            series_labels = dict(series_labels)
+            if name is not None and series != name:
+                continue
+            if any(series_labels.get(key) != value for key, value in labels.items()):
+                continue
+            snapshot = histogram.snapshot()
+            _, total, count = snapshot
+            result.append((series, series_labels, {
+                "count": count,
+                "sum_ms": round(total * 1000, 2),
+                "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+                **{f"p{int(q * 100)}_ms": round(histogram.quantile(q, snapshot) * 1000, 3) for q in (0.5, 0.95, 0.99)},
+            }))
+        return result
+
+    # Prometheus text exposition format, one histogram per series
+    def render_prometheus(self):
+        with self._lock:
+            items = sorted(self._histograms.items())
+        lines, described = [], set()
+        for (name, labels), histogram in items:
+            metric = f"mc1_{name}_seconds"
+            if metric not in described:
+                described.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            counts, total, count = histogram.snapshot()
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for upper, bucket_count in zip(histogram.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{prefix}le="{upper}"}} {cumulative}')
+            suffix = "{" + label_text + "}" if label_text else ""
+            lines.append(f"{metric}_sum{suffix} {total:.6f}")
+            lines.append(f"{metric}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+span = REGISTRY.span
+observe = REGISTRY.observe
+
+
+# Time a whole script run (or fragment run) of `page`; with profiling on, runs slower than
+# the threshold leave a .prof file behind (open it with snakeviz or pstats)
+@contextmanager
+def rerun(page, profile=PROFILE_RERUNS, threshold=PROFILE_THRESHOLD):
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running on this thread
+            profiler = None
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("rerun", elapsed, page=page)
+        if profiler is not None:
+            profiler.disable()
+            if elapsed >= threshold:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f"{page}-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms.prof"))
+
+
+def profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".prof")), reverse=True)
+
+
+def _write_file(path, interval):
+    while True:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(REGISTRY.render_prometheus())
+        # Atomic swap so the collector never reads half a file
+        os.replace(tmp, path)
+        time.sleep(interval)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Start the configured exporters once per process
+@st.cache_resource
+def start_exporters():
+    if METRICS_FILE:
+        threading.Thread(target=_write_file, args=(METRICS_FILE, METRICS_INTERVAL), name="metrics-file", daemon=True).start()
+    server = None
+    if METRICS_PORT:
+        server = ThreadingHTTPServer(("", METRICS_PORT), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+from datetime import date, datetime, time, timedelta
+
+from history import get_history_pager, record_timeline
+from metrics import PROFILE_RERUNS, rerun, span
+from queries import get_shift_options
+
+COLUMNS = ["No", "Time", "Shift", "Data 1", "Data 2", "Data 3", "Data 4", "Data 5"]
+TIMELINE_COLUMNS = COLUMNS[1:] + ["Changed"]
+
+
+def next_page(cursor):
+    st.session_state["history_cursors"].append(cursor)
+
+
+def previous_page():
+    if len(st.session_state["history_cursors"]) > 1:
+        st.session_state["history_cursors"].pop()
+
+
+# Browse user_data page by page, newest first
+def main():
+    st.set_page_config(page_title="History - Program MC1", layout="wide")
+    st.title("History")
+
+    filter_col1, filter_col2 = st.columns(2)
+    with filter_col1:
+        shift_option = st.selectbox("Shift", ["All", *get_shift_options()], index=0, key="history_shift")
+    with filter_col2:
+        today = date.today()
+        days = st.date_input("Date range", value=(today - timedelta(days=7), today), key="history_days")
+    start = end = None
+    if len(days) == 2:
+        start = datetime.combine(days[0], time.min)
+        end = datetime.combine(days[1] + timedelta(days=1), time.min)
+    filters = (shift_option, start, end)
+
+    # Each session keeps the stack of page cursors it has walked through; new filters start over
+    if st.session_state.get("history_filters") != filters:
+        st.session_state["history_filters"] = filters
+        st.session_state["history_cursors"] = [None]
+    cursors = st.session_state["history_cursors"]
+
+    pager = get_history_pager()
+    rows, next_cursor = pager.get_page(filters, cursors[-1])
+
+    if rows:
+        with span("dataframe_build", view="history"):
+            df = pd.DataFrame(rows, columns=COLUMNS)
+        with span("render", element="dataframe"):
+            st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.info("No data in this range.", icon="ℹ️")
+
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 1, 4])
+    with nav_col1:
+        st.button("◀ Newer", on_click=previous_page, disabled=len(cursors) == 1)
+    with nav_col2:
+        st.button("Older ▶", on_click=next_page, args=(next_cursor,), disabled=next_cursor is None)
+    with nav_col3:
+        st.caption(f"Page {len(cursors)} · {pager.page_size} rows per page")
+
+    # Earlier versions of one record, captured when CHANGE_HISTORY is on
+    st.subheader("Record timeline")
+    data_1 = st.text_input("Data 1", key="timeline_data_1").strip()
+    if data_1:
+        with span("record_timeline"):
+            timeline = record_timeline(data_1)
+        if timeline:
+            st.dataframe(pd.DataFrame(timeline, columns=TIMELINE_COLUMNS), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"No record {data_1}.", icon="ℹ️")
+
+    with st.sidebar.expander("History cache"):
+        st.json(pager.metrics())
+
+
+if __name__ == "__main__":
+    with rerun("history", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        main()
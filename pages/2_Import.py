@@ -0,0 +1,47 @@
+import streamlit as st
+import pandas as pd
+
+from bulk_import import IMPORT_CHUNK_SIZE, ImportFileError, import_file
+from metrics import PROFILE_RERUNS, rerun
+
+
+# Upload a CSV/Excel export (e.g. from MC1) and upsert it into user_data in one go
+def main():
+    st.set_page_config(page_title="Import - Program MC1", layout="wide")
+    st.title("Bulk import")
+    st.caption("Columns data_1 … data_5 are required; an optional time column sets time and shift.")
+
+    uploaded = st.file_uploader("CSV or Excel file", type=["csv", "xlsx", "xls"])
+    chunksize = st.number_input("Rows per chunk", min_value=1000, max_value=100000, value=IMPORT_CHUNK_SIZE, step=1000)
+    if uploaded is None or not st.button("Import", type="primary"):
+        return
+
+    bar = st.progress(0.0, text="Starting...")
+    total = uploaded.size or 1
+
+    def progress(stats):
+        bar.progress(min(uploaded.tell() / total, 1.0),
+                     text=f"{stats['rows_read']:,} rows read · {stats['rows_per_sec']:,.0f} rows/s")
+
+    try:
+        stats = import_file(uploaded, uploaded.name, int(chunksize), progress)
+    except ImportFileError as e:
+        bar.empty()
+        st.error(str(e), icon="⚠️")
+        return
+    bar.progress(1.0, text="Done")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rows read", f"{stats['rows_read']:,}")
+    col2.metric("Upserted", f"{stats['rows_merged']:,}")
+    col3.metric("Rejected", f"{stats['rows_rejected']:,}")
+    col4.metric("Rows/sec", f"{stats['rows_per_sec']:,.0f}")
+    st.success(f"Imported in {stats['seconds']:.2f} s", icon="✅")
+    if stats["rejects"]:
+        st.warning("Rejected rows (first ones shown)", icon="⚠️")
+        st.dataframe(pd.DataFrame(stats["rejects"], columns=["Row", "Reason"]), hide_index=True)
+
+
+if __name__ == "__main__":
+    with rerun("import", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        main()
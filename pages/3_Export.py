@@ -0,0 +1,75 @@
+import os
+from datetime import date, datetime, time, timedelta
+
+import streamlit as st
+
+from export import EXPORT_CHUNK_SIZE, FORMATS, ExportError, export_to_file
+from metrics import PROFILE_RERUNS, rerun
+from queries import get_shift_options
+
+
+# Drop the file of this session's previous export before making a new one
+def discard_export():
+    path = st.session_state.pop("export_path", None)
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+
+def read_export(path):
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+
+# Export user_data for a time range and shift to CSV or Parquet, streamed in chunks
+def main():
+    st.set_page_config(page_title="Export - Program MC1", layout="wide")
+    st.title("Export")
+
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with filter_col1:
+        shift_option = st.selectbox("Shift", ["All", *get_shift_options()], index=0, key="export_shift")
+    with filter_col2:
+        today = date.today()
+        days = st.date_input("Date range", value=(today - timedelta(days=30), today), key="export_days")
+    with filter_col3:
+        fmt = st.radio("Format", list(FORMATS), horizontal=True, key="export_format")
+    if len(days) != 2:
+        st.info("Pick a start and an end date.", icon="ℹ️")
+        return
+    start = datetime.combine(days[0], time.min)
+    end = datetime.combine(days[1] + timedelta(days=1), time.min)
+
+    if st.button("Prepare export", type="primary"):
+        discard_export()
+        bar = st.progress(0.0, text="Starting...")
+
+        def progress(stats):
+            # The total is unknown without a COUNT(*), so the bar just keeps moving
+            bar.progress((stats["chunks"] % 20 + 1) / 20, text=f"{stats['rows']:,} rows written")
+
+        try:
+            path, stats = export_to_file(fmt, shift_option, start, end, EXPORT_CHUNK_SIZE, progress)
+        except ExportError as e:
+            bar.empty()
+            st.error(str(e), icon="⚠️")
+            return
+        bar.empty()
+        st.session_state["export_path"] = path
+        st.session_state["export_stats"] = stats
+        st.session_state["export_name"] = f"user_data_{shift_option}_{days[0]:%Y%m%d}_{days[1]:%Y%m%d}.{fmt}"
+
+    path = st.session_state.get("export_path")
+    if path and os.path.exists(path):
+        stats = st.session_state["export_stats"]
+        name = st.session_state["export_name"]
+        st.success(f"{stats['rows']:,} rows · {stats['bytes'] / 1e6:,.1f} MB in {stats['seconds']:.2f} s", icon="✅")
+        # The file is only read when the button is clicked
+        st.download_button("Download " + name, read_export(path), file_name=name,
+                           mime=FORMATS[name.rsplit(".", 1)[1]], on_click="ignore")
+
+
+if __name__ == "__main__":
+    with rerun("export", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        main()
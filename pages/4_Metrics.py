@@ -0,0 +1,52 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+from metrics import METRICS_FILE, METRICS_PORT, PROFILE_DIR, REGISTRY, profiles, start_exporters
+
+
+def read_profile(name):
+    def read():
+        with open(os.path.join(PROFILE_DIR, name), "rb") as f:
+            return f.read()
+    return read
+
+
+# Where the time goes in this server process: span histograms, Prometheus text and slow-rerun profiles
+def main():
+    st.set_page_config(page_title="Metrics - Program MC1", layout="wide")
+    start_exporters()
+    st.title("Metrics")
+    st.caption("Timings since this server process started, aggregated over every session.")
+
+    summary = REGISTRY.summary()
+    if summary:
+        rows = [(name, ", ".join(f"{key}={value}" for key, value in labels.items()), *stats.values())
+                for name, labels, stats in summary]
+        columns = ["Span", "Labels", *summary[0][2].keys()]
+        st.dataframe(pd.DataFrame(rows, columns=columns), use_container_width=True, hide_index=True)
+    else:
+        st.info("Nothing measured yet; open one of the apps first.", icon="ℹ️")
+
+    with st.expander("Prometheus"):
+        exporters = []
+        if METRICS_FILE:
+            exporters.append(f"written to `{METRICS_FILE}`")
+        if METRICS_PORT:
+            exporters.append(f"served on port {METRICS_PORT} at `/metrics`")
+        st.caption("Exported " + " and ".join(exporters) if exporters else "Set METRICS_FILE or METRICS_PORT to export.")
+        text = REGISTRY.render_prometheus()
+        st.download_button("Download metrics.prom", text, file_name="metrics.prom", mime="text/plain")
+        st.code(text, language="text")
+
+    st.subheader("Slow rerun profiles")
+    names = profiles()
+    if not names:
+        st.caption(f"None yet. Turn on profiling in an app's sidebar (or PROFILE_RERUNS=1); files go to `{PROFILE_DIR}`.")
+    for name in names[:20]:
+        st.download_button(name, read_profile(name), file_name=name, key=f"profile_{name}", on_click="ignore")
+
+
+if __name__ == "__main__":
+    main()
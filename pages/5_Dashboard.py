@@ -0,0 +1,59 @@
+from datetime import date, datetime, time, timedelta
+
+import streamlit as st
+import pandas as pd
+
+from metrics import PROFILE_RERUNS, rerun, span
+from queries import get_hourly_counts, get_shift_options
+
+
+# Rows per shift and hour, read from the trigger-maintained summary table (never raw rows)
+def main():
+    st.set_page_config(page_title="Dashboard - Program MC1", layout="wide")
+    st.title("Dashboard")
+
+    filter_col1, filter_col2, filter_col3 = st.columns([2, 2, 1])
+    with filter_col1:
+        today = date.today()
+        days = st.date_input("Date range", value=(today - timedelta(days=89), today), key="dashboard_days")
+    with filter_col2:
+        options = get_shift_options()
+        shifts = st.multiselect("Shifts", options, default=options, key="dashboard_shifts")
+    with filter_col3:
+        per = st.radio("Per", ["Day", "Hour"], horizontal=True, key="dashboard_per")
+    if len(days) != 2:
+        st.info("Pick a start and an end date.", icon="ℹ️")
+        return
+    start = datetime.combine(days[0], time.min)
+    end = datetime.combine(days[1] + timedelta(days=1), time.min)
+
+    rows = get_hourly_counts(start, end)
+    with span("dataframe_build", view="dashboard"):
+        counts = pd.DataFrame(rows, columns=["hour", "shift", "rows"])
+        counts = counts[counts["shift"].isin(shifts)]
+    if counts.empty:
+        st.info("No data in this range.", icon="ℹ️")
+        return
+
+    totals = counts.groupby("shift")["rows"].sum()
+    for column, shift in zip(st.columns(len(shifts) + 1), ["All"] + shifts):
+        column.metric(f"Shift {shift}" if shift != "All" else "All shifts",
+                      f"{int(totals.sum() if shift == 'All' else totals.get(shift, 0)):,}")
+
+    by_time = counts.pivot_table(index="hour", columns="shift", values="rows", aggfunc="sum", fill_value=0)
+    if per == "Day":
+        by_time = by_time.resample("D").sum()
+    st.subheader(f"Rows per {per.lower()}")
+    st.bar_chart(by_time, stack=True)
+
+    # Which hours of the day each shift is busy, over the whole range
+    st.subheader("Rows by hour of day")
+    by_hour = counts.assign(hour_of_day=counts["hour"].dt.hour).pivot_table(
+        index="hour_of_day", columns="shift", values="rows", aggfunc="sum", fill_value=0)
+    st.bar_chart(by_hour, stack=True)
+    st.caption(f"{len(rows):,} summary rows read for {(end - start).days} days.")
+
+
+if __name__ == "__main__":
+    with rerun("dashboard", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        main()
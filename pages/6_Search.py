@@ -0,0 +1,46 @@
+import time
+
+import streamlit as st
+import pandas as pd
+
+from metrics import PROFILE_RERUNS, rerun, span
+from search import DATA_COLUMNS, MODES, SEARCH_ENGINE, get_search_index, search
+
+COLUMNS = ["No", "Time", "Shift", "Data 1", "Data 2", "Data 3", "Data 4", "Data 5"]
+LABELS = dict(zip(DATA_COLUMNS, COLUMNS[3:]))
+
+
+# Find rows by part of a data value, newest first
+def main():
+    st.set_page_config(page_title="Search - Program MC1", layout="wide")
+    st.title("Search")
+
+    query = st.text_input("Search", key="search_query", placeholder="Part of a serial, lot, ...")
+    option_col1, option_col2 = st.columns(2)
+    with option_col1:
+        mode = st.radio("Match", MODES, horizontal=True, key="search_mode")
+    with option_col2:
+        columns = st.multiselect("Columns", DATA_COLUMNS, default=list(DATA_COLUMNS), format_func=LABELS.get,
+                                 key="search_columns")
+
+    if query.strip():
+        started = time.perf_counter()
+        rows = search(query, columns, mode)
+        elapsed = time.perf_counter() - started
+        if rows:
+            with span("dataframe_build", view="search"):
+                df = pd.DataFrame(rows, columns=COLUMNS)
+            with span("render", element="dataframe"):
+                st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No matching rows.", icon="ℹ️")
+        st.caption(f"{len(rows)} rows · {elapsed * 1000:.1f} ms · {SEARCH_ENGINE}")
+
+    if SEARCH_ENGINE == "memory":
+        with st.sidebar.expander("Search index"):
+            st.json(get_search_index().metrics())
+
+
+if __name__ == "__main__":
+    with rerun("search", profile=st.session_state.get("profile_reruns", PROFILE_RERUNS)):
+        main()
@@ -0,0 +1,691 @@
+import os
+import re
+
+from backends import get_backend
+from cache import get_result_cache
+from metrics import span
+from shifts import get_shift_calendar
+
+# Rows shown in the Latest Data panel
+LATEST_LIMIT = int(os.getenv("LATEST_LIMIT", "10"))
+# Rows per page in the history browser
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+# Keep what a row looked like before every upsert that changed it, in user_data_changes
+CHANGE_HISTORY = os.getenv("CHANGE_HISTORY", "0") == "1"
+
+# Bump whenever create_schema changes so running databases pick the change up on next start
+SCHEMA_VERSION = 7
+
+# SQL Server accepts at most 1000 rows in a VALUES constructor
+MAX_ROWS_PER_STATEMENT = 500
+STAGING_ROWS_PER_INSERT = 1000
+
+# Live rows only, or live rows plus archived rows whose data_1 has not been written again since
+HOT = "user_data"
+ARCHIVE = "user_data_archive"
+ALL_ROWS = """(
+    SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5 FROM user_data
+    UNION ALL
+    SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5 FROM user_data_archive AS archived
+    WHERE NOT EXISTS (SELECT 1 FROM user_data AS live WHERE live.data_1 = archived.data_1)
+) AS user_data"""
+
+# +1 for every row that lands in an hour, -1 for every row that leaves it
+HOURLY_TRIGGER = """
+CREATE OR ALTER TRIGGER {name} ON {table} AFTER {events} AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE user_data_hourly AS target
+    USING (
+        SELECT hour, shift, SUM(delta) AS delta
+        FROM (
+            SELECT DATEADD(hour, DATEDIFF(hour, 0, time), 0) AS hour, ISNULL(shift, '') AS shift, 1 AS delta
+            FROM inserted WHERE time IS NOT NULL
+            UNION ALL
+            SELECT DATEADD(hour, DATEDIFF(hour, 0, time), 0), ISNULL(shift, ''), -1
+            FROM deleted WHERE time IS NOT NULL
+        ) AS changes
+        GROUP BY hour, shift
+        HAVING SUM(delta) <> 0
+    ) AS source
+    ON (target.hour = source.hour AND target.shift = source.shift)
+    WHEN MATCHED THEN
+        UPDATE SET row_count = target.row_count + source.delta
+    WHEN NOT MATCHED THEN
+        INSERT (hour, shift, row_count) VALUES (source.hour, source.shift, source.delta);
+END
+"""
+
+# A data_1 written again after its row was archived: the archived copy moves back into
+# user_data first (the newest copy, and never over a newer live row), so the upsert after it
+# applies its time guard against that row and the hourly summary counts the record once.
+# {keys} is the incoming data_1 values, as a parameter list or a subquery.
+RESTORE_ARCHIVED = """
+MERGE user_data AS target
+USING (
+    SELECT time, shift, data_1, data_2, data_3, data_4, data_5
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY data_1 ORDER BY time DESC, no DESC) AS rn
+        FROM user_data_archive WHERE data_1 IN ({keys})
+    ) AS archived
+    WHERE rn = 1
+) AS source
+ON (target.data_1 = source.data_1)
+WHEN MATCHED AND source.time > target.time THEN
+    UPDATE SET time = source.time, shift = source.shift, data_2 = source.data_2,
+               data_3 = source.data_3, data_4 = source.data_4, data_5 = source.data_5
+WHEN NOT MATCHED THEN
+    INSERT (time, shift, data_1, data_2, data_3, data_4, data_5)
+    VALUES (source.time, source.shift, source.data_1, source.data_2, source.data_3, source.data_4, source.data_5);
+DELETE FROM user_data_archive WHERE data_1 IN ({keys});
+"""
+
+COLUMNS = ("no", "time", "shift", "data_1", "data_2", "data_3", "data_4", "data_5")
+DATA_COLUMNS = ("data_1", "data_2", "data_3", "data_4", "data_5")
+
+# Columns an upsert can change, and their bit in user_data_changes.changed
+CHANGE_COLUMNS = ("time", "shift", "data_2", "data_3", "data_4", "data_5")
+CHANGE_BITS = {column: 1 << index for index, column in enumerate(CHANGE_COLUMNS)}
+
+# Appended to a MERGE on user_data when CHANGE_HISTORY is on: the MERGE outputs old and new
+# values into a table variable, and the rows it updated are written to user_data_changes in
+# the same batch, with the old value of just the columns that changed (NULL for the rest)
+# and a bitmask saying which those are. EXCEPT compares NULLs as equal.
+CAPTURE_DECLARE = """
+DECLARE @changes TABLE (
+    action NVARCHAR(10), no INT, data_1 NVARCHAR(255),
+    old_time DATETIME, old_shift NVARCHAR(10), old_data_2 NVARCHAR(255), old_data_3 NVARCHAR(255),
+    old_data_4 NVARCHAR(255), old_data_5 NVARCHAR(255),
+    new_time DATETIME, new_shift NVARCHAR(10), new_data_2 NVARCHAR(255), new_data_3 NVARCHAR(255),
+    new_data_4 NVARCHAR(255), new_data_5 NVARCHAR(255)
+);
+"""
+CAPTURE_OUTPUT = """
+OUTPUT $action, inserted.no, inserted.data_1,
+       deleted.time, deleted.shift, deleted.data_2, deleted.data_3, deleted.data_4, deleted.data_5,
+       inserted.time, inserted.shift, inserted.data_2, inserted.data_3, inserted.data_4, inserted.data_5
+INTO @changes
+"""
+CAPTURE_INSERT = """;
+INSERT INTO user_data_changes (no, data_1, changed, time, shift, data_2, data_3, data_4, data_5)
+SELECT no, data_1, diff.changed,
+       CASE WHEN diff.changed & 1 <> 0 THEN old_time END, CASE WHEN diff.changed & 2 <> 0 THEN old_shift END,
+       CASE WHEN diff.changed & 4 <> 0 THEN old_data_2 END, CASE WHEN diff.changed & 8 <> 0 THEN old_data_3 END,
+       CASE WHEN diff.changed & 16 <> 0 THEN old_data_4 END, CASE WHEN diff.changed & 32 <> 0 THEN old_data_5 END
+FROM @changes
+CROSS APPLY (SELECT
+      CASE WHEN EXISTS (SELECT old_time EXCEPT SELECT new_time) THEN 1 ELSE 0 END
+    | CASE WHEN EXISTS (SELECT old_shift EXCEPT SELECT new_shift) THEN 2 ELSE 0 END
+    | CASE WHEN EXISTS (SELECT old_data_2 EXCEPT SELECT new_data_2) THEN 4 ELSE 0 END
+    | CASE WHEN EXISTS (SELECT old_data_3 EXCEPT SELECT new_data_3) THEN 8 ELSE 0 END
+    | CASE WHEN EXISTS (SELECT old_data_4 EXCEPT SELECT new_data_4) THEN 16 ELSE 0 END
+    | CASE WHEN EXISTS (SELECT old_data_5 EXCEPT SELECT new_data_5) THEN 32 ELSE 0 END AS changed
+) AS diff
+WHERE action = 'UPDATE' AND diff.changed <> 0;
+"""
+
+
+# Create user_data and its indexes if they don't exist. The table is clustered on the
+# ever-increasing `no`, so inserts append to the last page instead of splitting pages at
+# random scan strings; data_1 stays unique through a nonclustered index.
+def create_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='user_data' AND xtype='U')
+    CREATE TABLE user_data (
+        no INT IDENTITY(1,1) NOT NULL,
+        time DATETIME,
+        shift NVARCHAR(10),
+        data_1 NVARCHAR(255) NOT NULL,
+        data_2 NVARCHAR(255),
+        data_3 NVARCHAR(255),
+        data_4 NVARCHAR(255),
+        data_5 NVARCHAR(255),
+        CONSTRAINT pk_user_data PRIMARY KEY CLUSTERED (no)
+    )
+    """)
+    migrate_clustered_key(cursor)
+    cursor.execute("IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='ux_data_1') CREATE UNIQUE INDEX ux_data_1 ON user_data(data_1)")
+    # The unique index replaces it
+    cursor.execute("IF EXISTS (SELECT * FROM sys.indexes WHERE name='idx_data_1') DROP INDEX idx_data_1 ON user_data")
+    # Latest Data reads the newest rows by time, for all shifts or one; both indexes carry the
+    # whole row so that query never goes back to the clustered index
+    create_covering_index(cursor, "idx_time", "time", "shift, " + ", ".join(DATA_COLUMNS))
+    # Shift-filtered views seek on (shift, time) instead of scanning the newest rows of every shift
+    create_covering_index(cursor, "idx_shift_time", "shift, time DESC", ", ".join(DATA_COLUMNS))
+    # Every insert or update bumps rv, so readers can ask for just what changed since they last looked
+    cursor.execute("IF COL_LENGTH('user_data', 'rv') IS NULL ALTER TABLE user_data ADD rv ROWVERSION")
+    cursor.execute("IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='idx_rv') CREATE INDEX idx_rv ON user_data(rv)")
+    create_hourly_summary(cursor)
+    create_archive(cursor)
+    create_change_history(cursor)
+    conn.commit()
+
+
+# Tables created before schema version 4 are clustered on data_1 (the PRIMARY KEY). Re-cluster
+# them on `no`. The nonclustered indexes are dropped first, because each of them would
+# otherwise be rebuilt twice: once for the heap and again for the new clustered key.
+# create_schema recreates them afterwards. This all runs in create_schema's transaction.
+def migrate_clustered_key(cursor):
+    cursor.execute("""
+    SELECT name FROM sys.indexes
+    WHERE object_id = OBJECT_ID('user_data') AND is_primary_key = 1 AND INDEX_COL('user_data', index_id, 1) = 'data_1'
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    for name in ("idx_data_1", "idx_time", "idx_shift_time", "idx_rv"):
+        cursor.execute(f"IF EXISTS (SELECT * FROM sys.indexes WHERE name='{name}') DROP INDEX {name} ON user_data")
+    cursor.execute(f"ALTER TABLE user_data DROP CONSTRAINT [{row[0]}]")
+    cursor.execute("ALTER TABLE user_data ADD CONSTRAINT pk_user_data PRIMARY KEY CLUSTERED (no)")
+    return True
+
+
+# Create index `name`, or rebuild it in place when it exists without the included columns
+def create_covering_index(cursor, name, keys, include):
+    cursor.execute("""
+    SELECT i.index_id, (SELECT COUNT(*) FROM sys.index_columns AS c
+                        WHERE c.object_id = i.object_id AND c.index_id = i.index_id AND c.is_included_column = 1)
+    FROM sys.indexes AS i
+    WHERE i.object_id = OBJECT_ID('user_data') AND i.name = %s
+    """, (name,))
+    row = cursor.fetchone()
+    if row is not None and row[1] >= len(include.split(",")):
+        return
+    options = " WITH (DROP_EXISTING = ON)" if row is not None else ""
+    cursor.execute(f"CREATE INDEX {name} ON user_data({keys}) INCLUDE ({include}){options}")
+
+
+# Leaf page count, page fill and logical fragmentation of every user_data index. Page splits
+# show up as both low fill and high fragmentation. SAMPLED mode reads 1% of the leaf pages
+# of large indexes, so this stays cheap enough for a benchmark run.
+def select_index_stats(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT i.name, s.page_count, s.avg_page_space_used_in_percent, s.avg_fragmentation_in_percent
+    FROM sys.dm_db_index_physical_stats(DB_ID(), OBJECT_ID('user_data'), NULL, NULL, 'SAMPLED') AS s
+    JOIN sys.indexes AS i ON i.object_id = s.object_id AND i.index_id = s.index_id
+    WHERE s.index_level = 0
+    ORDER BY i.index_id
+    """)
+    return [{"index": name, "pages": pages, "fill_pct": round(fill, 2), "fragmentation_pct": round(fragmentation, 2)}
+            for name, pages, fill, fragmentation in cursor.fetchall()]
+
+
+# Rows per (hour, shift), kept current by a trigger on every insert, update and delete, so
+# dashboards read a few thousand summary rows instead of grouping user_data. A NULL shift is
+# counted under ''.
+def create_hourly_summary(cursor):
+    cursor.execute("SELECT OBJECT_ID('user_data_hourly', 'U')")
+    backfill = cursor.fetchone()[0] is None
+    if backfill:
+        cursor.execute("""
+        CREATE TABLE user_data_hourly (
+            hour DATETIME NOT NULL,
+            shift NVARCHAR(10) NOT NULL,
+            row_count INT NOT NULL,
+            PRIMARY KEY (hour, shift)
+        )
+        """)
+    cursor.execute(HOURLY_TRIGGER.format(name="trg_user_data_hourly", table="user_data", events="INSERT, UPDATE, DELETE"))
+    # Same transaction as the trigger, so no write can slip between the backfill and the trigger
+    if backfill:
+        cursor.execute("""
+        INSERT INTO user_data_hourly (hour, shift, row_count)
+        SELECT DATEADD(hour, DATEDIFF(hour, 0, time), 0), ISNULL(shift, ''), COUNT(*)
+        FROM user_data
+        WHERE time IS NOT NULL
+        GROUP BY DATEADD(hour, DATEDIFF(hour, 0, time), 0), ISNULL(shift, '')
+        """)
+
+
+# Cold rows moved out by the retention job, page-compressed and clustered on (time, no) so
+# range reads seek. Its own hourly trigger adds back what leaving user_data took off, so
+# archiving leaves the dashboard counts unchanged; it also follows shift recomputations.
+def create_archive(cursor):
+    cursor.execute("""
+    IF OBJECT_ID('user_data_archive', 'U') IS NULL
+    BEGIN
+        CREATE TABLE user_data_archive (
+            no INT NOT NULL,
+            time DATETIME,
+            shift NVARCHAR(10),
+            data_1 NVARCHAR(255) NOT NULL,
+            data_2 NVARCHAR(255),
+            data_3 NVARCHAR(255),
+            data_4 NVARCHAR(255),
+            data_5 NVARCHAR(255),
+            archived_at DATETIME NOT NULL DEFAULT GETDATE()
+        );
+        CREATE CLUSTERED INDEX cx_archive_time ON user_data_archive(time, no) WITH (DATA_COMPRESSION = PAGE);
+        CREATE INDEX idx_archive_shift_time ON user_data_archive(shift, time DESC) WITH (DATA_COMPRESSION = PAGE);
+    END
+    """)
+    # Every upsert looks its keys up here (RESTORE_ARCHIVED), and so do lookups over ALL_ROWS
+    cursor.execute("""
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_archive_data_1')
+        CREATE INDEX idx_archive_data_1 ON user_data_archive(data_1) WITH (DATA_COMPRESSION = PAGE)
+    """)
+    cursor.execute(HOURLY_TRIGGER.format(name="trg_user_data_archive_hourly", table="user_data_archive", events="INSERT, UPDATE, DELETE"))
+
+
+# Earlier versions of upserted rows, written by the MERGEs when CHANGE_HISTORY is on (the
+# table always exists, so turning it on needs no migration). Append-only and clustered on
+# id, so capture writes go to the last page; page compression stores the NULLs of unchanged
+# columns in no space. A record's timeline is a seek on idx_changes_data_1.
+def create_change_history(cursor):
+    cursor.execute("""
+    IF OBJECT_ID('user_data_changes', 'U') IS NULL
+    BEGIN
+        CREATE TABLE user_data_changes (
+            id BIGINT IDENTITY(1,1) NOT NULL,
+            no INT NOT NULL,
+            data_1 NVARCHAR(255) NOT NULL,
+            changed TINYINT NOT NULL,
+            time DATETIME,
+            shift NVARCHAR(10),
+            data_2 NVARCHAR(255),
+            data_3 NVARCHAR(255),
+            data_4 NVARCHAR(255),
+            data_5 NVARCHAR(255),
+            CONSTRAINT pk_user_data_changes PRIMARY KEY CLUSTERED (id) WITH (DATA_COMPRESSION = PAGE)
+        );
+        CREATE INDEX idx_changes_data_1 ON user_data_changes(data_1, id DESC) WITH (DATA_COMPRESSION = PAGE);
+    END
+    """)
+
+
+# Up to `limit` captured changes of one record, newest first, as (changed, time, shift,
+# data_2, ..., data_5) with the values from before the change
+def select_changes_of(conn, data_1, limit):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT TOP (%s) changed, time, shift, data_2, data_3, data_4, data_5
+        FROM user_data_changes
+        WHERE data_1 = %s
+        ORDER BY id DESC
+    """, (limit, data_1))
+    return cursor.fetchall()
+
+
+# Move up to `limit` rows older than `before` into the archive in one transaction; returns
+# the number of rows moved. OUTPUT INTO cannot target a table with enabled triggers (Msg 334)
+# and the archive has its hourly trigger, so the deleted rows go through a table variable.
+def archive_rows(conn, before, limit):
+    cursor = conn.cursor()
+    cursor.execute("""
+        DECLARE @moved TABLE (
+            no INT, time DATETIME, shift NVARCHAR(10), data_1 NVARCHAR(255), data_2 NVARCHAR(255),
+            data_3 NVARCHAR(255), data_4 NVARCHAR(255), data_5 NVARCHAR(255)
+        );
+        DELETE TOP (%s) FROM user_data
+        OUTPUT deleted.no, deleted.time, deleted.shift, deleted.data_1, deleted.data_2,
+               deleted.data_3, deleted.data_4, deleted.data_5
+        INTO @moved
+        WHERE time < %s;
+        INSERT INTO user_data_archive (no, time, shift, data_1, data_2, data_3, data_4, data_5)
+        SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5 FROM @moved;
+        SELECT COUNT(*) FROM @moved;
+    """, (limit, before))
+    moved = cursor.fetchone()[0]
+    conn.commit()
+    return moved
+
+
+# Collation for comparing data_1 ignoring case: None when the column already does (the SQL
+# Server default, so lookups still seek ux_data_1), else the case-insensitive twin of its own
+def data_1_nocase_collation(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT collation_name FROM sys.columns WHERE object_id = OBJECT_ID('user_data') AND name = 'data_1'")
+    name = cursor.fetchone()[0]
+    return None if "_CI" in name else re.sub(r"_(CS|BIN2?)(_.*)?$", "_CI_AS", name)
+
+
+# Newest archived time, or None while the archive is empty; one seek on the clustered index
+def archive_boundary(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(time) FROM user_data_archive")
+    return cursor.fetchone()[0]
+
+
+# Which rows a read over [start, end) has to look at: the archive only holds rows up to
+# `boundary`, so ranges that start after it never touch the archive
+def row_source(start, boundary):
+    if boundary is None or (start is not None and start > boundary):
+        return HOT
+    return ALL_ROWS
+
+
+# Run create_schema only when the database is behind SCHEMA_VERSION; an up-to-date database
+# costs two metadata reads instead of a round of DDL. Returns True when DDL ran.
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT OBJECT_ID('schema_version', 'U')")
+    version = None
+    if cursor.fetchone()[0] is not None:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        version = cursor.fetchone()[0]
+    if version is not None and version >= SCHEMA_VERSION:
+        return False
+    create_schema(conn)
+    cursor.execute("IF OBJECT_ID('schema_version', 'U') IS NULL CREATE TABLE schema_version (version INT NOT NULL)")
+    cursor.execute("DELETE FROM schema_version")
+    cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+    conn.commit()
+    return True
+
+
+# Build the WHERE clause for the optional shift and time range [start, end)
+def build_filters(shift=None, start=None, end=None):
+    clauses, params = [], []
+    if shift and shift != "All":
+        clauses.append("shift = %s")
+        params.append(shift)
+    if start is not None:
+        clauses.append("time >= %s")
+        params.append(start)
+    if end is not None:
+        clauses.append("time < %s")
+        params.append(end)
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, params
+
+
+# Newest rows first, with the shift filter pushed down to SQL Server
+def select_rows(conn, shift=None, limit=LATEST_LIMIT, offset=0, source=HOT):
+    where, params = build_filters(shift)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM {source}
+        {where}
+        ORDER BY time DESC
+        OFFSET %s ROWS FETCH NEXT %s ROWS ONLY
+    """, (*params, offset, limit))
+    return cursor.fetchall()
+
+
+# Rows whose data_1 is one of `keys`: one seek per key on ux_data_1
+def select_by_keys(conn, keys, source=HOT, collation=None):
+    collate = f" COLLATE {collation}" if collation else ""
+    cursor = conn.cursor()
+    rows = []
+    for start in range(0, len(keys), MAX_ROWS_PER_STATEMENT):
+        chunk = keys[start:start + MAX_ROWS_PER_STATEMENT]
+        cursor.execute(f"""
+            SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5
+            FROM {source}
+            WHERE data_1{collate} IN ({", ".join(["%s"] * len(chunk))})
+        """, tuple(chunk))
+        rows += cursor.fetchall()
+    return rows
+
+
+# Up to `limit` (time, no, shift) rows of `table` in (time, no) order after the (time, no)
+# cursor `after`. Both tables have an index led by time that carries shift and no (idx_time,
+# cx_archive_time), so every batch is one range seek.
+def select_shift_rows(conn, after=None, limit=5000, table=HOT):
+    where, params = "WHERE time IS NOT NULL", []
+    if after is not None:
+        where += " AND (time > %s OR (time = %s AND no > %s))"
+        params += [after[0], after[0], after[1]]
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT TOP (%s) time, no, shift
+        FROM {table}
+        {where}
+        ORDER BY time, no
+    """, (limit, *params))
+    return cursor.fetchall()
+
+
+# Set the shift of (no, time, shift) rows in one transaction. A row whose time moved since it
+# was read was rewritten by a submit, which assigned its shift already, so it is left alone.
+# Returns the number of rows changed.
+def update_shift_rows(conn, rows, table=HOT):
+    cursor = conn.cursor()
+    updated = 0
+    for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        chunk = rows[start:start + MAX_ROWS_PER_STATEMENT]
+        values = ", ".join(["(%s, %s, %s)"] * len(chunk))
+        cursor.execute(f"""
+        UPDATE target SET shift = source.shift
+        FROM {table} AS target
+        JOIN (VALUES {values}) AS source (no, time, shift)
+            ON target.no = source.no AND target.time = source.time
+        WHERE target.shift IS NULL OR target.shift <> source.shift
+        """, tuple(value for row in chunk for value in row))
+        updated += cursor.rowcount
+    conn.commit()
+    return updated
+
+
+# Full-text index over the data columns, for SEARCH_ENGINE=fulltext. Full-text DDL cannot run
+# inside a transaction, so it runs in autocommit mode. Returns False when the instance has no
+# Full-Text Search installed.
+def create_fulltext(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT FULLTEXTSERVICEPROPERTY('IsFullTextInstalled')")
+    if not cursor.fetchone()[0]:
+        return False
+    conn.autocommit(True)
+    try:
+        cursor.execute("IF NOT EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'mc1_catalog') CREATE FULLTEXT CATALOG mc1_catalog")
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('user_data'))
+        CREATE FULLTEXT INDEX ON user_data (data_1, data_2, data_3, data_4, data_5)
+        KEY INDEX pk_user_data ON mc1_catalog WITH CHANGE_TRACKING AUTO
+        """)
+    finally:
+        conn.autocommit(False)
+    return True
+
+
+# Newest rows with a word starting with `query` in any of `columns` (full-text matches words
+# and word prefixes, not arbitrary substrings)
+def select_fulltext(conn, query, columns, limit):
+    term = '"' + query.replace('"', '""') + '*"'
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT TOP (%s) no, time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM user_data
+        WHERE CONTAINS(({", ".join(columns)}), %s)
+        ORDER BY time DESC
+    """, (limit, term))
+    return cursor.fetchall()
+
+
+# Highest rowversion that is certainly committed; changes made after it have a larger rv
+def current_watermark(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1")
+    return cursor.fetchone()[0]
+
+
+# Rows inserted or updated after the `since` watermark, oldest change first
+def select_changes(conn, since, limit):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT TOP (%s) no, time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM user_data
+        WHERE rv > CONVERT(BINARY(8), CAST(%s AS BIGINT))
+        ORDER BY rv
+    """, (limit, since))
+    return cursor.fetchall()
+
+
+# (watermark, rows): the rows plus the watermark to ask for changes from afterwards
+def fetch_latest(shift="All", limit=LATEST_LIMIT, page=0):
+    return get_backend().latest(shift, limit, page * limit)
+
+
+def fetch_changes(since, limit):
+    return get_backend().changes(since, limit)
+
+
+# Latest Data snapshot through the process-wide cache, keyed by (shift, limit, page)
+def get_latest_snapshot(shift="All", limit=LATEST_LIMIT, page=0):
+    return get_result_cache().get((shift, limit, page), lambda: fetch_latest(shift, limit, page))
+
+
+def get_latest(shift="All", limit=LATEST_LIMIT, page=0):
+    return get_latest_snapshot(shift, limit, page)[1]
+
+
+# Rows changed since a watermark through the same cache: every view that is up to date holds
+# the same watermark, so one query serves all of them. The key starts with "All", so every
+# committed write batch invalidates it.
+def get_changes(since, limit):
+    return get_result_cache().get(("All", "changes", since, limit), lambda: fetch_changes(since, limit))
+
+
+# (hour, shift, rows) for hours in [start, end), oldest first; one range seek on the summary key
+def select_hourly(conn, start, end):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT hour, shift, row_count
+        FROM user_data_hourly
+        WHERE hour >= %s AND hour < %s AND row_count > 0
+        ORDER BY hour, shift
+    """, (start, end))
+    return cursor.fetchall()
+
+
+# Dashboard counts through the process-wide cache. The key starts with "All" so every
+# committed write batch invalidates it.
+def get_hourly_counts(start, end):
+    return get_result_cache().get(("All", "hourly", start, end), lambda: get_backend().hourly_counts(start, end))
+
+
+# Shift names rows carry; the summary is small (hours x shifts), so this is a short scan
+def select_stored_shifts(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT shift FROM user_data_hourly WHERE row_count > 0 AND shift <> ''")
+    return [row[0] for row in cursor.fetchall()]
+
+
+# Shift names for filters and charts: the calendar's, then names that only rows from before
+# a calendar change still carry, so those stay selectable until their shifts are recomputed.
+# New writes only bring calendar names, so the stored names are left to the cache TTL.
+def get_shift_options():
+    names = [str(name) for name in get_shift_calendar().names[1:]]
+    stored = get_result_cache().get(("stored_shifts",), lambda: get_backend().stored_shifts())
+    return names + sorted(set(stored) - set(names))
+
+
+# One page of history in (time, no) order, newest first. `after` is the (time, no) of the last
+# row on the previous page, so every page is an index seek no matter how deep (no OFFSET scan).
+def select_page(conn, shift=None, start=None, end=None, after=None, limit=HISTORY_PAGE_SIZE, source=HOT):
+    where, params = build_filters(shift, start, end)
+    if after is not None:
+        where = (where + " AND" if where else "WHERE") + " (time < %s OR (time = %s AND no < %s))"
+        params += [after[0], after[0], after[1]]
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT TOP (%s) no, time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM {source}
+        {where}
+        ORDER BY time DESC, no DESC
+    """, (limit, *params))
+    return cursor.fetchall()
+
+
+# Matching rows oldest first, fetched in lists of at most `chunksize` rows. pymssql reads the
+# result off the wire as it is fetched, so only one chunk is held in memory at a time.
+def iter_rows(conn, shift=None, start=None, end=None, chunksize=5000, source=HOT):
+    where, params = build_filters(shift, start, end)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT no, time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM {source}
+        {where}
+        ORDER BY time, no
+    """, tuple(params))
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            return
+        yield rows
+
+
+# Upsert many rows with one multi-row MERGE per chunk; rows are (time, shift, data_1, ..., data_5)
+# and must already be unique on data_1. A row never overwrites a newer one for the same data_1,
+# so replaying the spool after a crash or outage is idempotent.
+def merge_rows(conn, rows):
+    cursor = conn.cursor()
+    for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        chunk = rows[start:start + MAX_ROWS_PER_STATEMENT]
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+        keys = tuple(row[2] for row in chunk)
+        with span("db_merge"):
+            cursor.execute(f"""
+            {RESTORE_ARCHIVED.format(keys=", ".join(["%s"] * len(keys)))}
+            {CAPTURE_DECLARE if CHANGE_HISTORY else ""}
+            MERGE user_data AS target
+            USING (VALUES {values}) AS source (time, shift, data_1, data_2, data_3, data_4, data_5)
+            ON (target.data_1 = source.data_1)
+            WHEN MATCHED AND (target.time IS NULL OR source.time >= target.time) THEN
+                UPDATE SET time = source.time, shift = source.shift, data_2 = source.data_2,
+                           data_3 = source.data_3, data_4 = source.data_4, data_5 = source.data_5
+            WHEN NOT MATCHED THEN
+                INSERT (time, shift, data_1, data_2, data_3, data_4, data_5)
+                VALUES (source.time, source.shift, source.data_1, source.data_2, source.data_3, source.data_4, source.data_5)
+            {CAPTURE_OUTPUT + CAPTURE_INSERT if CHANGE_HISTORY else ";"}
+            """, keys + keys + tuple(value for row in chunk for value in row))
+    with span("db_commit"):
+        conn.commit()
+
+
+def create_staging(cursor):
+    cursor.execute("""
+    CREATE TABLE #import_staging (
+        seq INT IDENTITY(1,1),
+        time DATETIME,
+        shift NVARCHAR(10),
+        data_1 NVARCHAR(255) NOT NULL,
+        data_2 NVARCHAR(255),
+        data_3 NVARCHAR(255),
+        data_4 NVARCHAR(255),
+        data_5 NVARCHAR(255)
+    )
+    """)
+
+
+def stage_rows(cursor, rows):
+    for start in range(0, len(rows), STAGING_ROWS_PER_INSERT):
+        chunk = rows[start:start + STAGING_ROWS_PER_INSERT]
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+        cursor.execute(f"""
+        INSERT INTO #import_staging (time, shift, data_1, data_2, data_3, data_4, data_5)
+        VALUES {values}
+        """, tuple(value for row in chunk for value in row))
+
+
+# One set-based MERGE from staging; the newest row per data_1 wins and never overwrites a newer row
+def merge_staging(cursor):
+    cursor.execute(f"""
+    {RESTORE_ARCHIVED.format(keys="SELECT data_1 FROM #import_staging")}
+    {CAPTURE_DECLARE if CHANGE_HISTORY else ""}
+    MERGE user_data AS target
+    USING (
+        SELECT time, shift, data_1, data_2, data_3, data_4, data_5
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY data_1 ORDER BY time DESC, seq DESC) AS rn
+            FROM #import_staging
+        ) AS ranked
+        WHERE rn = 1
+    ) AS source
+    ON (target.data_1 = source.data_1)
+    WHEN MATCHED AND (target.time IS NULL OR source.time >= target.time) THEN
+        UPDATE SET time = source.time, shift = source.shift, data_2 = source.data_2,
+                   data_3 = source.data_3, data_4 = source.data_4, data_5 = source.data_5
+    WHEN NOT MATCHED THEN
+        INSERT (time, shift, data_1, data_2, data_3, data_4, data_5)
+        VALUES (source.time, source.shift, source.data_1, source.data_2, source.data_3, source.data_4, source.data_5)
+    {CAPTURE_OUTPUT + CAPTURE_INSERT + "SELECT COUNT(*) FROM @changes;" if CHANGE_HISTORY else "; SELECT @@ROWCOUNT;"}
+    """)
+    # The batch runs several statements, so the MERGE count is selected rather than read from
+    # rowcount; with capture on, every merged row is in @changes
+    merged = cursor.fetchone()[0]
+    cursor.execute("DROP TABLE #import_staging")
+    return merged
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from metrics import observe
+
+# Threads that run database reads for every session in the process
+READ_WORKERS = int(os.getenv("READ_WORKERS", "4"))
+# Seconds a session waits for a read before giving up on it and keeping what it showed last
+READ_TIMEOUT = float(os.getenv("READ_TIMEOUT", "10"))
+# Seconds a rerun waits for a fresh result before drawing the previous one as "refreshing"
+READ_WAIT = float(os.getenv("READ_WAIT", "0.25"))
+
+
+class ReadError(Exception):
+    pass
+
+
+# Runs reads off the script threads, so a slow query only holds an executor thread while
+# the session keeps drawing. Python cannot stop a running thread: cancel() drops a read
+# that has not started yet, and a read that has started runs to the end with its result
+# thrown away; on SQL Server the read pool's READ_QUERY_TIMEOUT cancels it there.
+class ReadExecutor:
+    def __init__(self, workers=READ_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="db-read")
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "abandoned": 0, "in_flight": 0}
+
+    def submit(self, name, fn, *args):
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["in_flight"] += 1
+        future = self._pool.submit(self._run, name, fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, name, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            observe("read", time.perf_counter() - started, view=name)
+
+    def _done(self, future):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if future.cancelled():
+                self._stats["cancelled"] += 1
+            elif future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    # Stop waiting for `future`: cancel it if it is still queued, otherwise let it finish unread
+    def abandon(self, future):
+        if not future.cancel():
+            with self._lock:
+                self._stats["abandoned"] += 1
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+@st.cache_resource
+def get_read_executor():
+    return ReadExecutor()
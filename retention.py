@@ -0,0 +1,90 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from backends import get_backend
+from write_queue import get_write_queue
+
+# Rows whose time is older than RETENTION_DAYS move from user_data to user_data_archive
+# (0 turns retention off). The job wakes every RETENTION_INTERVAL seconds and moves
+# RETENTION_BATCH rows per statement, pausing RETENTION_PAUSE seconds between batches so
+# it never holds locks long enough to stall submits.
+RETENTION_DAYS = float(os.getenv("RETENTION_DAYS", "0"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", "5000"))
+RETENTION_PAUSE = float(os.getenv("RETENTION_PAUSE", "0.1"))
+
+logger = logging.getLogger(__name__)
+
+
+# Background thread that keeps user_data small by archiving cold rows in batches
+class RetentionJob:
+    def __init__(self, days=RETENTION_DAYS, interval=RETENTION_INTERVAL, batch=RETENTION_BATCH, pause=RETENTION_PAUSE):
+        self.days = days
+        self.interval = interval
+        self.batch = max(batch, 1)
+        self.pause = pause
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "batches": 0, "archived": 0, "last_run": None, "last_cutoff": None,
+                       "last_run_ms": 0.0, "errors": 0, "last_error": None, "failing": False}
+        self._thread = None
+        if days > 0:
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    # Archive everything older than the cutoff; returns the number of rows moved
+    def run_once(self, now=None):
+        cutoff = (now or datetime.now()) - timedelta(days=self.days)
+        started = time.monotonic()
+        moved = 0
+        while not self._stopping.is_set():
+            batch = get_backend().archive_before(cutoff, self.batch)
+            moved += batch
+            with self._lock:
+                self._stats["batches"] += 1
+            if batch < self.batch:
+                break
+            time.sleep(self.pause)
+        if moved:
+            # Cached reads may still hold rows that just moved
+            get_write_queue().publish(None)
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["archived"] += moved
+            self._stats["last_run"] = datetime.now().isoformat(sep=" ", timespec="seconds")
+            self._stats["last_cutoff"] = cutoff.isoformat(sep=" ", timespec="seconds")
+            self._stats["last_run_ms"] = round((time.monotonic() - started) * 1000, 2)
+            self._stats["failing"] = False
+        return moved
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Nothing was archived; left unnoticed, user_data keeps growing
+                logger.exception("retention run failed")
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = str(e)
+                    self._stats["failing"] = True
+            self._stopping.wait(self.interval)
+
+    def close(self):
+        self._stopping.set()
+
+    def metrics(self):
+        with self._lock:
+            return {"enabled": self._thread is not None, "days": self.days, **self._stats}
+
+
+# One retention job per server process; with several app processes the moves interleave
+# safely because each batch is a single atomic statement
+@st.cache_resource
+def get_retention_job():
+    return RetentionJob()
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+
+from backends import get_backend
+from metrics import span
+from write_queue import get_write_queue
+
+# "memory": the in-process index below. "fulltext": SQL Server full-text search (word and
+# word-prefix matches only; needs Full-Text Search on the instance).
+SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "memory")
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "50"))
+# Rows upserted since the last build that are searched on the side; past this the index is
+# rebuilt in the background
+SEARCH_DELTA_MAX = int(os.getenv("SEARCH_DELTA_MAX", "20000"))
+BUILD_CHUNK_SIZE = 50000
+
+DATA_COLUMNS = ("data_1", "data_2", "data_3", "data_4", "data_5")
+MODES = ("substring", "prefix", "exact")
+SEP = "\n"
+
+
+# One data column as a single lower-cased string, "\nvalue0\nvalue1\n...\n", plus the offset
+# each value starts at. str.find runs over it at memory speed, so a substring, prefix
+# ("\n" + needle) or whole-value ("\n" + needle + "\n") search over millions of values costs
+# milliseconds, and the row of a hit is a binary search over the offsets.
+class ColumnText:
+    def __init__(self, values):
+        values = [value.lower().replace(SEP, " ") if value else "" for value in values]
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        self.starts = np.empty(len(values), dtype=np.int64)
+        if len(values):
+            self.starts[0] = 1
+            np.cumsum(lengths[:-1] + 1, out=self.starts[1:])
+            self.starts[1:] += 1
+        self.text = SEP + SEP.join(values) + SEP
+
+    # Rows with a match, newest (highest row) first; rows are in build order, oldest first
+    def find(self, needle, mode, limit):
+        pattern = {"substring": needle, "prefix": SEP + needle, "exact": SEP + needle + SEP}[mode]
+        rows, end = [], len(self.text)
+        while len(rows) < limit:
+            position = self.text.rfind(pattern, 0, end)
+            if position == -1:
+                break
+            row = int(np.searchsorted(self.starts, position + (mode != "substring"), side="right")) - 1
+            rows.append(row)
+            # Nothing further right in this value, or in any newer one
+            end = int(self.starts[row])
+        return rows
+
+
+# Process-wide index over data_1..data_5, built from user_data on the first search and kept
+# current from the upsert path. It only proposes data_1 keys; the rows themselves are read
+# back through the data_1 index and checked again, so a stale entry never shows up as a hit.
+class SearchIndex:
+    def __init__(self, delta_max=SEARCH_DELTA_MAX):
+        self.delta_max = delta_max
+        self._keys = None      # data_1 per row, in build order
+        self._columns = None   # column name -> ColumnText
+        self._delta = {}       # data_1 -> (seq, lower-cased values) for rows upserted since the build
+        self._seq = 0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._stats = {"rows": 0, "builds": 0, "build_seconds": 0.0, "searches": 0, "last_search_ms": 0.0}
+
+    def build(self):
+        with self._build_lock:
+            started = time.perf_counter()
+            with self._lock:
+                seq = self._seq
+            keys, values = [], {column: [] for column in DATA_COLUMNS}
+            for chunk in get_backend().export_rows(chunksize=BUILD_CHUNK_SIZE):
+                for row in chunk:
+                    keys.append(row[3])
+                    for column, value in zip(DATA_COLUMNS, row[3:]):
+                        values[column].append(value)
+            columns = {}
+            for column in DATA_COLUMNS:
+                columns[column] = ColumnText(values.pop(column))
+            with self._lock:
+                self._keys, self._columns = keys, columns
+                # Upserts committed before the build started are in it now
+                self._delta = {key: entry for key, entry in self._delta.items() if entry[0] > seq}
+                self._stats["rows"] = len(keys)
+                self._stats["builds"] += 1
+                self._stats["build_seconds"] = round(time.perf_counter() - started, 3)
+                self._rebuilding = False
+
+    def _rebuild_later(self):
+        with self._lock:
+            if self._rebuilding or self._keys is None:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self.build, name="search-rebuild", daemon=True).start()
+
+    # Write queue listener: rows are (time, shift, data_1, ..., data_5); None is a bulk change
+    def on_rows(self, rows):
+        if rows is None:
+            self._rebuild_later()
+            return
+        with self._lock:
+            for row in rows:
+                self._seq += 1
+                # Popped first so a rewritten key moves to the newest end
+                self._delta.pop(row[2], None)
+                self._delta[row[2]] = (self._seq, [value.lower() if value else "" for value in row[2:]])
+            overflow = len(self._delta) > self.delta_max
+        if overflow:
+            self._rebuild_later()
+
+    # data_1 keys of up to `limit` candidate rows, newest first
+    def candidates(self, needle, columns, mode, limit):
+        if self._keys is None:
+            self.build()
+        with self._lock:
+            keys, texts, delta = self._keys, self._columns, list(self._delta.items())
+        found = []
+        indexes = [DATA_COLUMNS.index(column) for column in columns]
+        for key, (_, values) in reversed(delta):
+            if any(_match(values[index], needle, mode) for index in indexes):
+                found.append(key)
+        superseded = {key for key, _ in delta}
+        rows = set()
+        for column in columns:
+            rows.update(texts[column].find(needle, mode, limit))
+        # Highest row is the newest build-time row
+        for row in sorted(rows, reverse=True):
+            if keys[row] not in superseded:
+                found.append(keys[row])
+        return list(dict.fromkeys(found))[:limit]
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["delta"] = len(self._delta)
+            stats["built"] = self._keys is not None
+            stats["text_mb"] = round(sum(len(text.text) for text in self._columns.values()) / 2 ** 20, 1) if self._columns else 0.0
+            return stats
+
+    def record(self, elapsed):
+        with self._lock:
+            self._stats["searches"] += 1
+            self._stats["last_search_ms"] = round(elapsed * 1000, 2)
+
+
+# `value` is lower-cased already
+def _match(value, needle, mode):
+    if mode == "exact":
+        return value == needle
+    return value.startswith(needle) if mode == "prefix" else needle in value
+
+
+def _matches(row, needle, columns, mode):
+    return any(_match((row[3 + DATA_COLUMNS.index(column)] or "").lower(), needle, mode) for column in columns)
+
+
+# Rows whose data columns contain (substring), start with (prefix) or equal (exact) `query`,
+# case-insensitively, newest first. An exact data_1 match is a key lookup that ignores case
+# in SQL, so it never has to build the index.
+def search(query, columns=DATA_COLUMNS, mode="substring", limit=SEARCH_LIMIT):
+    needle = query.strip().lower().replace(SEP, " ")
+    columns = [column for column in DATA_COLUMNS if column in columns]
+    if not needle or not columns:
+        return []
+    backend = get_backend()
+    started = time.perf_counter()
+    with span("search", mode=mode):
+        if mode == "exact" and columns == ["data_1"]:
+            rows = backend.lookup([query.strip()], nocase=True)
+        elif SEARCH_ENGINE == "fulltext" and mode != "exact":
+            rows = backend.fulltext_search(query.strip(), columns, limit)
+        else:
+            index = get_search_index()
+            keys = index.candidates(needle, columns, mode, limit)
+            rows = backend.lookup(keys) if keys else []
+            index.record(time.perf_counter() - started)
+        rows = [row for row in rows if _matches(row, needle, columns, mode)]
+    rows.sort(key=lambda row: row[1] or datetime.min, reverse=True)
+    return rows[:limit]
+
+
+@st.cache_resource
+def get_search_index():
+    index = SearchIndex()
+    get_write_queue().add_listener(index.on_rows)
+    return index
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import streamlit as st
+
+# Optional JSON shift calendar that replaces DEFAULT_CALENDAR, e.g.
+#   {"timezone": "Asia/Bangkok",
+#    "shifts": [{"shift": "A", "start": "06:00", "end": "14:00"},
+#               {"shift": "B", "start": "14:00", "end": "22:00"},
+#               {"shift": "C", "start": "22:00", "end": "06:00"}],
+#    "weekdays": {"sun": [{"shift": "D", "start": "00:00", "end": "00:00"}]},
+#    "holidays": {"2026-12-31": "sun", "2027-01-01": []}}
+# The file is re-read when it changes, so new boundaries apply without a restart.
+SHIFT_CALENDAR = os.getenv("SHIFT_CALENDAR", "")
+
+# "shifts" is the day every weekday follows unless "weekdays" (mon..sun) or "holidays"
+# (YYYY-MM-DD) say otherwise; a holiday is a list of periods or the name of a weekday to copy.
+# A period covers [start, end) on its own calendar day; end <= start wraps around midnight
+# within that day, and start == end is the whole day. Later periods win where they overlap;
+# minutes no period covers get "fallback".
+# "timezone" is the plant's zone. Row times are the writing host's local wall clock
+# (datetime.now()), so they are converted to it first; null keeps them as they are.
+DEFAULT_CALENDAR = {
+    "timezone": None,
+    "shifts": [
+        {"shift": "A", "start": "09:00", "end": "10:00"},
+        {"shift": "B", "start": "10:00", "end": "11:00"},
+        {"shift": "C", "start": "11:00", "end": "13:00"},
+        {"shift": "D", "start": "13:00", "end": "09:00"},
+    ],
+    "weekdays": {},
+    "holidays": {},
+    "fallback": "Unknown",
+}
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_MINUTES = 24 * 60
+EPOCH = datetime(1970, 1, 1)
+# The shift column is NVARCHAR(10)
+SHIFT_NAME_MAX = 10
+
+
+class CalendarError(Exception):
+    pass
+
+
+def _minute(text):
+    try:
+        hour, minute = map(int, text.split(":"))
+    except (AttributeError, ValueError):
+        raise CalendarError(f"bad time {text!r}; expected HH:MM") from None
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > DAY_MINUTES:
+        raise CalendarError(f"bad time {text!r}; expected HH:MM")
+    return hour * 60 + minute
+
+
+def _shift_name(name):
+    if not isinstance(name, str) or len(name) > SHIFT_NAME_MAX:
+        raise CalendarError(f"bad shift name {name!r}; expected text of at most {SHIFT_NAME_MAX} characters")
+    return name
+
+
+# A compiled calendar: one shift code per minute of the week (Monday 00:00 first), one
+# per minute of the day for each holiday, and the shift names the codes point into.
+# Assigning a shift is two index operations, one row or a whole column at a time.
+class ShiftCalendar:
+    def __init__(self, calendar=None):
+        calendar = calendar or DEFAULT_CALENDAR
+        try:
+            self.timezone = ZoneInfo(calendar["timezone"]) if calendar.get("timezone") else None
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            raise CalendarError(f"unknown timezone {calendar['timezone']!r}") from e
+        names = [_shift_name(calendar.get("fallback", DEFAULT_CALENDAR["fallback"]))]
+        codes = {names[0]: 0}
+
+        def day_table(periods):
+            if not isinstance(periods, list):
+                raise CalendarError(f"expected a list of periods, got {periods!r}")
+            table = np.zeros(DAY_MINUTES, dtype=np.uint8)
+            for period in periods:
+                try:
+                    shift, start, end = _shift_name(period["shift"]), _minute(period["start"]), _minute(period["end"])
+                except (KeyError, TypeError):
+                    raise CalendarError(f"bad period {period!r}") from None
+                if shift not in codes:
+                    if len(names) == 256:
+                        raise CalendarError("more than 255 shifts")
+                    codes[shift] = len(names)
+                    names.append(shift)
+                if start < end:
+                    table[start:end] = codes[shift]
+                else:
+                    table[start:] = codes[shift]
+                    table[:end] = codes[shift]
+            return table
+
+        default = calendar.get("shifts", DEFAULT_CALENDAR["shifts"])
+        weekdays = calendar.get("weekdays", {})
+        unknown = set(weekdays) - set(WEEKDAYS)
+        if unknown:
+            raise CalendarError(f"unknown weekday {sorted(unknown)[0]!r}; expected one of {', '.join(WEEKDAYS)}")
+        days = [day_table(weekdays.get(day, default)) for day in WEEKDAYS]
+        self.week = np.concatenate(days)
+        self.holidays = {}
+        for day, periods in calendar.get("holidays", {}).items():
+            try:
+                day = date.fromisoformat(day)
+            except (TypeError, ValueError):
+                raise CalendarError(f"bad holiday date {day!r}; expected YYYY-MM-DD") from None
+            if isinstance(periods, str):
+                if periods not in WEEKDAYS:
+                    raise CalendarError(f"holiday {day}: unknown weekday {periods!r}")
+                self.holidays[day] = days[WEEKDAYS.index(periods)]
+            else:
+                self.holidays[day] = day_table(periods)
+        self.names = np.array(names, dtype=object)
+        # Holidays by days since 1970-01-01, the unit the vectorized path works in
+        self._holiday_tables = {(day - EPOCH.date()).days: table for day, table in self.holidays.items()}
+        self._holiday_days = np.array(sorted(self._holiday_tables), dtype=np.int64)
+        # Same tables, same assignments: lets a backfill tell which calendar it applied
+        digest = hashlib.sha1(str(self.timezone).encode() + self.week.tobytes() + repr(names).encode())
+        for day in sorted(self.holidays):
+            digest.update(day.isoformat().encode() + self.holidays[day].tobytes())
+        self.version = digest.hexdigest()[:12]
+
+    # Plant wall-clock time of a row time
+    def localize(self, when):
+        if self.timezone is None:
+            return when
+        return when.astimezone(self.timezone).replace(tzinfo=None)
+
+    def shift_at(self, when):
+        local = self.localize(when)
+        minute = local.hour * 60 + local.minute
+        table = self.holidays.get(local.date())
+        if table is not None:
+            return self.names[table[minute]]
+        return self.names[self.week[local.weekday() * DAY_MINUTES + minute]]
+
+    # Minutes to add to a row time (minutes since 1970) to get plant time
+    def _offset(self, minutes):
+        when = EPOCH + timedelta(minutes=minutes)
+        return (self.localize(when) - when) // timedelta(minutes=1)
+
+    # Shifts for a pandas Series of naive datetimes (no NaT) as a numpy array of names, in
+    # integer minute arithmetic. UTC offsets only change on quarter-hour boundaries, so the
+    # zone conversion runs once per distinct quarter-hour rather than once per row.
+    def shifts_of(self, times):
+        if getattr(times.dt, "tz", None) is not None:
+            times = times.dt.tz_localize(None)
+        minutes = times.to_numpy(dtype="datetime64[m]").astype(np.int64)
+        if self.timezone is not None:
+            quarters, inverse = np.unique(minutes // 15, return_inverse=True)
+            offsets = np.fromiter((self._offset(int(quarter) * 15) for quarter in quarters), dtype=np.int64,
+                                  count=len(quarters))
+            minutes = minutes + offsets[inverse]
+        days, minute = np.divmod(minutes, DAY_MINUTES)
+        # 1970-01-01 was a Thursday (weekday 3)
+        codes = self.week[(days + 3) % 7 * DAY_MINUTES + minute]
+        if len(self._holiday_days):
+            for day in np.unique(days[np.isin(days, self._holiday_days)]):
+                rows = days == day
+                codes[rows] = self._holiday_tables[int(day)][minute[rows]]
+        return self.names[codes]
+
+    def metrics(self):
+        return {"version": self.version, "timezone": str(self.timezone) if self.timezone else None,
+                "shifts": [name for name in self.names[1:]], "fallback": self.names[0],
+                "holidays": len(self.holidays)}
+
+
+def load_calendar(path=SHIFT_CALENDAR):
+    if not path:
+        return DEFAULT_CALENDAR
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# The calendar file as last compiled, checked for changes at most once a second. A broken
+# edit keeps the previous calendar in force and is reported in metrics() instead.
+class CalendarSource:
+    def __init__(self, path=SHIFT_CALENDAR):
+        self.path = path
+        self.calendar = ShiftCalendar(load_calendar(path))
+        self.loaded_at = datetime.now()
+        self.error = None
+        self._mtime = os.path.getmtime(path) if path else None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self.path:
+            return self.calendar
+        now = time.monotonic()
+        if now - self._checked < 1:
+            return self.calendar
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self.calendar = ShiftCalendar(load_calendar(self.path))
+                    self.loaded_at = datetime.now()
+                    self.error = None
+            except (OSError, ValueError, CalendarError) as e:
+                self.error = str(e)
+        return self.calendar
+
+    def metrics(self):
+        return {"path": self.path or None, **self.get().metrics(),
+                "loaded_at": self.loaded_at.isoformat(sep=" ", timespec="seconds"), "error": self.error}
+
+
+@st.cache_resource
+def get_calendar_source():
+    return CalendarSource()
+
+
+def get_shift_calendar():
+    return get_calendar_source().get()
+
+
+# Shift a row written at `time` belongs to
+def get_shift(time):
+    return get_shift_calendar().shift_at(time)
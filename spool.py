@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Local spool settings; ":memory:" keeps the queue in RAM (not durable)
+SPOOL_PATH = os.getenv("SPOOL_PATH", "spool.db")
+
+COLUMNS = ("time", "shift", "data_1", "data_2", "data_3", "data_4", "data_5")
+# SQLite limits bound parameters per statement
+MAX_IDS_PER_STATEMENT = 500
+
+
+# Append-only local spool (SQLite in WAL mode, fsync on every commit). Submits land here
+# first and are removed only after the matching MERGE has been committed on the server.
+class Spool:
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=2, check_same_thread=False, isolation_level=None)
+        try:
+            # Exclusive locking: one process owns a spool, so two apps never replay the same rows
+            self._conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            raise RuntimeError(f"spool {path} is in use by another process; give each app its own SPOOL_PATH") from e
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS spool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            enqueued_at REAL NOT NULL,
+            time TEXT NOT NULL,
+            shift TEXT,
+            data_1 TEXT NOT NULL,
+            data_2 TEXT,
+            data_3 TEXT,
+            data_4 TEXT,
+            data_5 TEXT
+        )
+        """)
+        # Rows the server rejected (e.g. values too long); kept for inspection instead of being dropped
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS spool_rejected (
+            id INTEGER PRIMARY KEY,
+            enqueued_at REAL NOT NULL,
+            rejected_at REAL NOT NULL,
+            error TEXT,
+            time TEXT NOT NULL,
+            shift TEXT,
+            data_1 TEXT NOT NULL,
+            data_2 TEXT,
+            data_3 TEXT,
+            data_4 TEXT,
+            data_5 TEXT
+        )
+        """)
+
+    def append(self, row):
+        record = (time.time(), row[0].isoformat(sep=" "), *row[1:])
+        with self._lock:
+            cursor = self._conn.execute("""
+            INSERT INTO spool (enqueued_at, time, shift, data_1, data_2, data_3, data_4, data_5)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, record)
+            return cursor.lastrowid
+
+    # Several rows in one transaction, so a batch costs one fsync; returns their ids in order
+    def append_many(self, rows):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                ids = [self._conn.execute("""
+                    INSERT INTO spool (enqueued_at, time, shift, data_1, data_2, data_3, data_4, data_5)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (now, row[0].isoformat(sep=" "), *row[1:])).lastrowid for row in rows]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # A transaction left open here would make every later spool call fail
+                self._conn.execute("ROLLBACK")
+                raise
+            return ids
+
+    # Oldest entries first: [(id, enqueued_at, (time, shift, data_1, ..., data_5)), ...]
+    def peek(self, limit):
+        with self._lock:
+            rows = self._conn.execute("""
+            SELECT id, enqueued_at, time, shift, data_1, data_2, data_3, data_4, data_5
+            FROM spool ORDER BY id LIMIT ?
+            """, (limit,)).fetchall()
+        return [(row[0], row[1], (datetime.fromisoformat(row[2]), *row[3:])) for row in rows]
+
+    def ack(self, ids):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for start in range(0, len(ids), MAX_IDS_PER_STATEMENT):
+                    chunk = ids[start:start + MAX_IDS_PER_STATEMENT]
+                    self._conn.execute(f"DELETE FROM spool WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def reject(self, id, error):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("""
+                INSERT OR REPLACE INTO spool_rejected
+                    (id, enqueued_at, rejected_at, error, time, shift, data_1, data_2, data_3, data_4, data_5)
+                SELECT id, enqueued_at, ?, ?, time, shift, data_1, data_2, data_3, data_4, data_5
+                FROM spool WHERE id = ?
+                """, (time.time(), error, id))
+                self._conn.execute("DELETE FROM spool WHERE id = ?", (id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def depth(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def oldest_enqueued_at(self):
+        with self._lock:
+            row = self._conn.execute("SELECT enqueued_at FROM spool ORDER BY id LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def rejected_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool_rejected").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from backends.sqlite import SqliteBackend
+
+NINE = datetime(2026, 1, 1, 9)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "user_data.db"))
+    backend.ensure_schema()
+    return backend
+
+
+def row(data_1, minute, data_2=""):
+    return (NINE.replace(minute=minute), "A", data_1, data_2, "", "", "")
+
+
+def archived(backend):
+    return backend._conn.execute("SELECT COUNT(*) FROM user_data_archive").fetchone()[0]
+
+
+def counts(backend):
+    return backend.hourly_counts(NINE, NINE.replace(hour=10))
+
+
+def test_rescan_after_archive_counts_the_record_once(backend):
+    backend.upsert_many([row("k1", 10, "first")])
+    assert backend.archive_before(NINE.replace(hour=10), 100) == 1
+    backend.upsert_many([row("k1", 30, "rescan")])
+    assert counts(backend) == [(NINE, "A", 1)]
+    assert archived(backend) == 0
+    [(_, time, _, _, data_2, *_)] = backend.lookup(["k1"])
+    assert (time, data_2) == (NINE.replace(minute=30), "rescan")
+
+
+def test_replay_older_than_the_archived_row_does_not_hide_it(backend):
+    backend.upsert_many([row("k2", 30, "newer")])
+    backend.archive_before(NINE.replace(hour=10), 100)
+    backend.upsert_many([row("k2", 0, "older")])
+    [(_, time, _, _, data_2, *_)] = backend.lookup(["k2"])
+    assert (time, data_2) == (NINE.replace(minute=30), "newer")
+    assert counts(backend) == [(NINE, "A", 1)]
+
+
+def test_import_after_archive_counts_the_record_once(backend):
+    backend.upsert_many([row("k3", 10), row("k4", 20)])
+    backend.archive_before(NINE.replace(hour=10), 100)
+    assert backend.import_chunks([[row("k3", 40, "imported")]]) == 1
+    assert counts(backend) == [(NINE, "A", 2)]
+    assert archived(backend) == 1
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import search
+from backends.sqlite import SqliteBackend
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = SqliteBackend(str(tmp_path / "user_data.db"))
+    backend.ensure_schema()
+    index = search.SearchIndex()
+    monkeypatch.setattr(search, "get_backend", lambda: backend)
+    monkeypatch.setattr(search, "get_search_index", lambda: index)
+    return backend
+
+
+def write(backend, rows):
+    start = datetime(2026, 1, 1, 8)
+    backend.upsert_many([(start + timedelta(minutes=n), "A", *values) for n, values in enumerate(rows)])
+
+
+def test_exact_match_is_not_crowded_out_by_substrings(backend):
+    # The exact hit is the oldest row; 100 newer rows only contain it
+    write(backend, [("k-exact", "ab", "", "", "")] + [(f"k{n}", "xab", "", "", "") for n in range(100)])
+    rows = search.search("ab", columns=["data_2"], mode="exact", limit=10)
+    assert [row[3] for row in rows] == ["k-exact"]
+
+
+def test_exact_data_1_ignores_case(backend):
+    write(backend, [("target", "a", "", "", ""), ("other", "b", "", "", "")])
+    rows = search.search("TARGET", columns=["data_1"], mode="exact")
+    assert [row[3] for row in rows] == ["target"]
+
+
+def test_prefix_and_substring(backend):
+    write(backend, [("SN-100", "", "", "", ""), ("SN-200", "", "", "", ""), ("XSN-300", "", "", "", "")])
+    assert [row[3] for row in search.search("sn-", columns=["data_1"], mode="prefix")] == ["SN-200", "SN-100"]
+    assert len(search.search("sn-", columns=["data_1"], mode="substring")) == 3
+
+
+def test_exact_data_1_does_not_build_the_index(backend):
+    write(backend, [("Target", "a", "", "", "")])
+    assert [row[3] for row in search.search("tARGET", columns=["data_1"], mode="exact")] == ["Target"]
+    assert search.get_search_index()._keys is None
+
+
+def test_rewritten_delta_key_is_newest(backend):
+    index = search.get_search_index()
+    index.build()
+    start = datetime(2026, 1, 1, 8)
+    for n, key in enumerate(["k1", "k2", "k1"]):
+        index.on_rows([(start + timedelta(minutes=n), "A", key, "ab", "", "", "")])
+    assert index.candidates("ab", ["data_2"], "substring", 10) == ["k1", "k2"]
@@ -0,0 +1,11 @@
+import pytest
+
+from shifts import CalendarError, ShiftCalendar
+
+
+def test_shift_names_fit_the_shift_column():
+    ShiftCalendar({"shifts": [{"shift": "X" * 10, "start": "00:00", "end": "12:00"}], "fallback": "Y" * 10})
+    with pytest.raises(CalendarError):
+        ShiftCalendar({"shifts": [{"shift": "X" * 11, "start": "00:00", "end": "12:00"}]})
+    with pytest.raises(CalendarError):
+        ShiftCalendar({"fallback": "Y" * 11})
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from spool import Spool
+
+
+def row(data_1, time=datetime(2026, 1, 1, 8)):
+    return (time, "A", data_1, "x", "y", "z", "w")
+
+
+def test_failed_append_rolls_back(tmp_path):
+    spool = Spool(str(tmp_path / "spool.db"))
+    spool.append_many([row("ok-1")])
+    # The second row cannot be bound, after the first one is already inserted
+    with pytest.raises(Exception):
+        spool.append_many([row("lost"), row(object())])
+    assert spool.append_many([row("ok-2")])
+    assert [entry[2][2] for entry in spool.peek(10)] == ["ok-1", "ok-2"]
+    spool.close()
+
+
+def test_ack_and_reject_after_failure(tmp_path):
+    spool = Spool(str(tmp_path / "spool.db"))
+    first, second = spool.append_many([row("a"), row("b")])
+    with pytest.raises(Exception):
+        spool.ack([object()])
+    spool.reject(second, "too long")
+    spool.ack([first])
+    assert spool.depth() == 0
+    assert spool.rejected_count() == 1
+    spool.close()
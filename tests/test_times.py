@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from bulk_import import normalize_chunk
+from ingest import parse_record
+from mc1 import data
+from validation import InvalidRecord
+
+RECORD = {"data_1": "k1", "data_2": "x", "data_3": "x", "data_4": "x", "data_5": "x"}
+
+
+class Queue:
+    def submit_many(self, rows):
+        self.rows = rows
+        return [object() for _ in rows]
+
+
+def test_out_of_range_times_are_rejected(monkeypatch):
+    queue = Queue()
+    monkeypatch.setattr(data, "get_write_queue", lambda: queue)
+    values, _ = parse_record(RECORD)
+    times = [datetime(1700, 1, 1), datetime(2026, 1, 1), None]
+    tickets, rejects = data.add_or_update_many([values] * 3, times=times, double_scans=False)
+    assert [index for index, _ in rejects] == [0]
+    assert len(tickets) == 2
+
+
+def test_parse_record_rejects_times_that_overflow():
+    with pytest.raises(InvalidRecord):
+        parse_record({**RECORD, "time": "9999-12-31T23:59:00-12:00"})
+
+
+def test_import_rejects_out_of_range_times():
+    chunk = pd.DataFrame({"time": ["1700-01-01 00:00", "2026-01-01 08:00"],
+                          **{column: ["k1", "k2"] if column == "data_1" else ["x", "x"] for column in RECORD}})
+    rows, rejects = normalize_chunk(chunk, 2, datetime.now())
+    assert [number for number, _ in rejects] == [2]
+    assert [row[2] for row in rows] == ["k2"]
@@ -0,0 +1,73 @@
+import sqlite3
+from datetime import datetime
+
+import pymssql
+import pytest
+
+from backends.mssql import MssqlBackend
+
+from backends.sqlite import SqliteBackend
+from spool import Spool
+from write_queue import WriteBehindQueue
+
+
+# Fails every batch holding a "bad" row the way SQL Server reports a too-long value
+class TruncatingBackend(SqliteBackend):
+    def upsert_many(self, rows):
+        if any(row[3] == "bad" for row in rows):
+            raise sqlite3.OperationalError("string or binary data would be truncated")
+        super().upsert_many(rows)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    backend = TruncatingBackend(str(tmp_path / "user_data.db"))
+    backend.ensure_schema()
+    queue = WriteBehindQueue(Spool(str(tmp_path / "spool.db")), backend, flush_interval=0.01)
+    yield queue
+    queue.close(5)
+
+
+def stored(queue, data_1):
+    (row,) = queue._backend.lookup([data_1])
+    return row[1], row[4]
+
+
+def test_older_row_in_the_same_batch_does_not_win(queue):
+    # A gateway sends buffered readings out of order in one request
+    tickets = queue.submit_many([
+        (datetime(2026, 1, 1, 12), "A", "dup", "noon", "", "", ""),
+        (datetime(2026, 1, 1, 8), "A", "dup", "morning", "", "", ""),
+    ])
+    assert queue.flush(5)
+    assert all(ticket.wait(5) and ticket.status == "persisted" for ticket in tickets)
+    assert stored(queue, "dup") == (datetime(2026, 1, 1, 12), "noon")
+
+
+def test_equal_times_go_to_the_later_submit(queue):
+    at = datetime(2026, 1, 1, 9)
+    queue.submit_many([(at, "A", "same", "first", "", "", ""), (at, "A", "same", "second", "", "", "")])
+    assert queue.flush(5)
+    assert stored(queue, "same") == (at, "second")
+
+
+def test_bad_row_is_rejected_and_later_rows_still_commit(queue):
+    at = datetime(2026, 1, 1, 9)
+    tickets = queue.submit_many([(at, "A", "k1", "good", "", "", ""), (at, "A", "k2", "bad", "", "", ""),
+                                 (at, "A", "k3", "good", "", "", "")])
+    assert queue.flush(5)
+    assert [ticket.status for ticket in tickets] == ["persisted", "failed", "persisted"]
+    assert queue.metrics()["rejected"] == 1
+    assert stored(queue, "k3") == (at, "good")
+    queue.submit_many([(at, "A", "k4", "good", "", "", "")])
+    assert queue.flush(5)
+    assert stored(queue, "k4") == (at, "good")
+
+
+def test_only_connection_level_server_errors_are_retried():
+    backend = MssqlBackend()
+    assert not backend.is_transient(pymssql.OperationalError(8152, b"String or binary data would be truncated."))
+    assert not backend.is_transient(pymssql.OperationalError(242, b"out-of-range datetime value"))
+    assert backend.is_transient(pymssql.OperationalError(1205, b"deadlock victim"))
+    assert backend.is_transient(pymssql.OperationalError(20009, b"Unable to connect"))
+    assert backend.is_transient(pymssql.InterfaceError("Connection is closed."))
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+from datetime import datetime
+
+import streamlit as st
+
+# Optional JSON file that overrides DEFAULT_RULES, e.g.
+#   {"fields": {"data_1": {"pattern": "[A-Z]{2}\\d{8}", "case": "upper"},
+#               "data_3": {"allowed": ["OK", "NG"]}},
+#    "checks": [{"check": "distinct", "fields": ["data_1", "data_2"]}],
+#    "duplicate_window": 5}
+VALIDATION_RULES = os.getenv("VALIDATION_RULES", "")
+
+DATA_COLUMNS = ("data_1", "data_2", "data_3", "data_4", "data_5")
+
+# Per field: trim (strip whitespace), case ("upper"/"lower"), required, min_length,
+# max_length, pattern (whole-value regex), allowed (list of values). Cross-field checks:
+# "distinct" (no two of the fields equal) and "equal" (all of them equal).
+# max_length 255 matches the NVARCHAR(255) columns, so the server never rejects a row.
+# duplicate_window: seconds in which a session submitting the same data_1 again is taken for
+# a double scan and refused (0 turns it off).
+DEFAULT_RULES = {
+    "fields": {column: {"trim": True, "required": True, "max_length": 255} for column in DATA_COLUMNS},
+    "checks": [],
+    "duplicate_window": 3,
+}
+CHECKS = ("distinct", "equal")
+# The range of the DATETIME time column; the server refuses anything outside it
+TIME_MIN = datetime(1753, 1, 1)
+TIME_MAX = datetime(9999, 12, 31, 23, 59, 59, 997000)
+
+
+class RuleError(Exception):
+    pass
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def check_time(written_at):
+    if not TIME_MIN <= written_at <= TIME_MAX:
+        raise InvalidRecord(f"time {written_at.isoformat()} is outside {TIME_MIN.year}-{TIME_MAX.year}")
+
+
+# One field's rules, compiled once
+class FieldRule:
+    def __init__(self, name, trim=True, case=None, required=True, min_length=None, max_length=None,
+                 pattern=None, allowed=None):
+        if case not in (None, "upper", "lower"):
+            raise RuleError(f"{name}: case must be 'upper' or 'lower'")
+        self.name = name
+        self.trim = trim
+        self.case = case
+        self.required = required
+        self.min_length = min_length
+        self.max_length = max_length
+        self.pattern = re.compile(pattern) if pattern else None
+        self.allowed = frozenset(allowed) if allowed is not None else None
+
+    def normalize(self, value):
+        value = "" if value is None else str(value)
+        if self.trim:
+            value = value.strip()
+        if self.case == "upper":
+            value = value.upper()
+        elif self.case == "lower":
+            value = value.lower()
+        return value
+
+    # Reason the normalized value is rejected, or None
+    def check(self, value):
+        if not value:
+            return f"{self.name} is empty" if self.required else None
+        if self.min_length is not None and len(value) < self.min_length:
+            return f"{self.name} is shorter than {self.min_length}"
+        if self.max_length is not None and len(value) > self.max_length:
+            return f"{self.name} is longer than {self.max_length}"
+        if self.pattern is not None and not self.pattern.fullmatch(value):
+            return f"{self.name} does not match {self.pattern.pattern}"
+        if self.allowed is not None and value not in self.allowed:
+            return f"{self.name} is not an allowed value"
+        return None
+
+    # The same normalization over a whole column (a pandas Series of str)
+    def normalize_series(self, series):
+        series = series.fillna("").astype(str)
+        if self.trim:
+            series = series.str.strip()
+        if self.case == "upper":
+            series = series.str.upper()
+        elif self.case == "lower":
+            series = series.str.lower()
+        return series
+
+    # The same checks over a whole column: [(bad mask, reason)] in the order check() tries them
+    def check_series(self, series):
+        lengths = series.str.len()
+        empty = (lengths == 0).to_numpy()
+        failures = []
+        if self.required:
+            failures.append((empty, f"{self.name} is empty"))
+        filled = ~empty
+        if self.min_length is not None:
+            failures.append((filled & (lengths < self.min_length).to_numpy(), f"{self.name} is shorter than {self.min_length}"))
+        if self.max_length is not None:
+            failures.append((filled & (lengths > self.max_length).to_numpy(), f"{self.name} is longer than {self.max_length}"))
+        if self.pattern is not None:
+            failures.append((filled & ~series.str.fullmatch(self.pattern).to_numpy(dtype=bool), f"{self.name} does not match {self.pattern.pattern}"))
+        if self.allowed is not None:
+            failures.append((filled & ~series.isin(self.allowed).to_numpy(), f"{self.name} is not an allowed value"))
+        return failures
+
+
+# A compiled rule set. validate_record() checks one submit in plain Python; validate_frame()
+# runs the same rules as column operations over a whole import chunk.
+class Validator:
+    def __init__(self, rules=None):
+        rules = rules or DEFAULT_RULES
+        fields = {column: dict(DEFAULT_RULES["fields"][column]) for column in DATA_COLUMNS}
+        for column, options in rules.get("fields", {}).items():
+            if column not in fields:
+                raise RuleError(f"unknown field {column!r}")
+            fields[column].update(options)
+        try:
+            self.fields = [FieldRule(column, **fields[column]) for column in DATA_COLUMNS]
+        except (TypeError, re.error) as e:
+            raise RuleError(str(e)) from e
+        self.checks = []
+        for check in rules.get("checks", []):
+            if check.get("check") not in CHECKS or not set(check.get("fields", ())) <= set(DATA_COLUMNS):
+                raise RuleError(f"bad cross-field check {check!r}")
+            self.checks.append((check["check"], [DATA_COLUMNS.index(column) for column in check["fields"]]))
+        self.duplicate_window = float(rules.get("duplicate_window", DEFAULT_RULES["duplicate_window"]))
+
+    def _check_reason(self, check, columns):
+        names = ", ".join(DATA_COLUMNS[index] for index in columns)
+        return f"{names} must be different" if check == "distinct" else f"{names} must be equal"
+
+    # Returns (normalized values, reason or None)
+    def validate_record(self, values):
+        values = [rule.normalize(value) for rule, value in zip(self.fields, values)]
+        for rule, value in zip(self.fields, values):
+            reason = rule.check(value)
+            if reason:
+                return values, reason
+        for check, columns in self.checks:
+            picked = [values[index] for index in columns]
+            ok = len(set(picked)) == len(picked) if check == "distinct" else len(set(picked)) == 1
+            if not ok:
+                return values, self._check_reason(check, columns)
+        return values, None
+
+    # Normalize the data_N columns of `frame` (str dtype) and find the rows that break a
+    # rule. Returns (normalized frame, bad mask, reasons array); the first failing rule wins.
+    def validate_frame(self, frame):
+        import numpy as np
+        import pandas as pd
+
+        frame = pd.DataFrame({rule.name: rule.normalize_series(frame[rule.name]) for rule in self.fields})
+        bad = np.zeros(len(frame), dtype=bool)
+        reasons = np.full(len(frame), "", dtype=object)
+        failures = [failure for rule in self.fields for failure in rule.check_series(frame[rule.name])]
+        for check, columns in self.checks:
+            first = frame[DATA_COLUMNS[columns[0]]]
+            if check == "equal":
+                mask = np.zeros(len(frame), dtype=bool)
+                for index in columns[1:]:
+                    mask |= (frame[DATA_COLUMNS[index]] != first).to_numpy()
+            else:
+                mask = np.zeros(len(frame), dtype=bool)
+                for i, left in enumerate(columns):
+                    for right in columns[i + 1:]:
+                        mask |= (frame[DATA_COLUMNS[left]] == frame[DATA_COLUMNS[right]]).to_numpy()
+            failures.append((mask, self._check_reason(check, columns)))
+        for mask, reason in failures:
+            new = mask & ~bad
+            reasons[new] = reason
+            bad |= new
+        return frame, bad, reasons
+
+
+def load_rules(path=VALIDATION_RULES):
+    if not path:
+        return DEFAULT_RULES
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# The validator for this process, compiled from VALIDATION_RULES on first use
+@st.cache_resource
+def get_validator():
+    return Validator(load_rules())
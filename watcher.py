@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import streamlit as st
+
+from backends import get_backend
+from write_queue import get_write_queue
+
+# Seconds between change probes, and between live refreshes of the Latest Data panel
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "2"))
+
+
+# One background thread per process probes the highest rowversion of user_data (a single seek on idx_rv)
+# and bumps `version` when it moves. Sessions compare versions in memory and only query
+# the database when something actually changed.
+class ChangeWatcher:
+    def __init__(self, interval=WATCH_INTERVAL):
+        self.interval = interval
+        self.version = 0
+        self.watermark = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._stats = {"probes": 0, "changes": 0, "local_changes": 0, "probe_errors": 0, "last_error": None}
+        self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+        self._thread.start()
+
+    def _probe(self):
+        return get_backend().max_version()
+
+    def _bump(self, stat):
+        with self._lock:
+            self.version += 1
+            self._stats[stat] += 1
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                watermark = self._probe()
+                with self._lock:
+                    self._stats["probes"] += 1
+                    changed = watermark != self.watermark
+                    self.watermark = watermark
+                if changed:
+                    self._bump("changes")
+            except Exception as e:
+                with self._lock:
+                    self._stats["probe_errors"] += 1
+                    self._stats["last_error"] = str(e)
+            time.sleep(self.interval)
+
+    # Writes committed by this process are announced right away instead of on the next probe
+    def notify_local(self):
+        self._bump("local_changes")
+
+    def close(self):
+        self._stopping = True
+
+    def metrics(self):
+        with self._lock:
+            return {"version": self.version, "watermark": self.watermark, **self._stats}
+
+
+@st.cache_resource
+def get_change_watcher():
+    watcher = ChangeWatcher()
+    get_write_queue().add_listener(lambda rows: watcher.notify_local())
+    return watcher
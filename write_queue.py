@@ -0,0 +1,312 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+from backends import get_backend
+from bus import get_bus
+from metrics import observe
+from spool import Spool
+
+# Write-behind settings
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "200"))        # rows per upsert
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", "0.5"))  # max seconds a submit waits for its batch
+WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "100000"))        # spooled rows before submits are refused
+WRITE_RETRY_BACKOFF = float(os.getenv("WRITE_RETRY_BACKOFF", "1"))
+WRITE_RETRY_BACKOFF_MAX = float(os.getenv("WRITE_RETRY_BACKOFF_MAX", "30"))
+
+COLUMNS = ("time", "shift", "data_1", "data_2", "data_3", "data_4", "data_5")
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Handle returned for every submit; resolves once the row (or a newer row for the same data_1) is committed
+class WriteTicket:
+    def __init__(self, data_1):
+        self.data_1 = data_1
+        self.submitted_at = time.time()
+        self.persisted_at = None
+        self.error = None
+        self._event = threading.Event()
+
+    @property
+    def status(self):
+        if not self._event.is_set():
+            return "pending"
+        return "failed" if self.error else "persisted"
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def _resolve(self, error=None):
+        self.error = error
+        self.persisted_at = time.time()
+        self._event.set()
+
+
+# Write-behind queue backed by the local spool: submits are appended to the spool and return
+# immediately, and a background worker replays the spool in order with one upsert per batch,
+# flushed when a batch is full or the oldest entry hits its deadline
+class WriteBehindQueue:
+    def __init__(self, spool, backend, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL,
+                 max_pending=WRITE_QUEUE_MAX):
+        self._spool = spool
+        self._backend = backend
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._tickets = {}  # spool id -> ticket, for submits made by this process
+        self._listeners = []  # called with the rows of every committed batch
+        self._depth = spool.depth()
+        self._oldest_at = spool.oldest_enqueued_at() or 0.0
+        self._replayed = deque()  # (finished_at, rows) for the replay rate
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "persisted": 0,
+            "failed": 0,
+            "batches": 0,
+            "retries": 0,
+            "last_error": None,
+            "last_batch_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        ticket = WriteTicket(row[2])
+        with self._cond:
+            if self._stopping:
+                raise QueueFull("write queue is shutting down")
+            if self._depth >= self.max_pending:
+                raise QueueFull(f"{self._depth} rows are waiting to be written")
+            # Durable before we acknowledge the submit
+            spool_id = self._spool.append(row)
+            self._tickets[spool_id] = ticket
+            if not self._depth:
+                self._oldest_at = time.time()
+            self._depth += 1
+            self._stats["submitted"] += 1
+            if self._depth == 1 or self._depth >= self.batch_size:
+                self._cond.notify_all()
+        return ticket
+
+    # Submit several rows at once (e.g. a burst from a scanner); all of them are spooled or none
+    def submit_many(self, rows):
+        tickets = [WriteTicket(row[2]) for row in rows]
+        with self._cond:
+            if self._stopping:
+                raise QueueFull("write queue is shutting down")
+            if self._depth + len(rows) > self.max_pending:
+                raise QueueFull(f"{self._depth} rows are waiting to be written")
+            spool_ids = self._spool.append_many(rows)
+            self._tickets.update(zip(spool_ids, tickets))
+            if not self._depth:
+                self._oldest_at = time.time()
+            self._depth += len(rows)
+            self._stats["submitted"] += len(rows)
+            self._cond.notify_all()
+        return tickets
+
+    # remote=False listeners only hear about writes made by this process
+    def add_listener(self, listener, remote=True):
+        self._listeners.append((listener, remote))
+
+    # Announce rows committed to user_data; also used by writers that bypass the queue and,
+    # with remote=True, for writes another replica announced on the bus.
+    # rows=None means a bulk change whose rows are not listed (listeners drop everything).
+    def publish(self, rows, remote=False):
+        for listener, hears_remote in list(self._listeners):
+            if remote and not hears_remote:
+                continue
+            try:
+                listener(rows)
+            except Exception:
+                # A failing listener must not stop the writer
+                pass
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._depth and not self._stopping:
+                self._cond.wait()
+            if not self._depth:
+                return None
+            deadline = self._oldest_at + self.flush_interval
+            while self._depth < self.batch_size and not self._flush_requested and not self._stopping:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        entries = self._spool.peek(self.batch_size)
+        with self._cond:
+            self._inflight = len(entries)
+        return entries
+
+    # Collapse a spool batch to the newest row per data_1, like the MERGE time guard: an older
+    # row never replaces a newer one, whatever order they were spooled in (rows can carry their
+    # own time). Entries come in spool order, so equal times go to the later submit.
+    def _group(self, entries):
+        latest = {}
+        for spool_id, _, row in entries:
+            kept, ids = latest.get(row[2], (None, []))
+            ids.append(spool_id)
+            latest[row[2]] = (row if kept is None or row[0] >= kept[0] else kept, ids)
+        with self._cond:
+            self._stats["deduplicated"] += len(entries) - len(latest)
+        return list(latest.values())
+
+    def _write_batch(self, groups):
+        started = time.monotonic()
+        self._backend.upsert_many([row for row, _ in groups])
+        elapsed = time.monotonic() - started
+        observe("write_batch", elapsed)
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["last_batch_ms"] = round(elapsed * 1000, 2)
+
+    # Retry rows one at a time so a single bad row does not hold up the rest of its batch
+    def _write_isolated(self, groups):
+        failed = []
+        for group in groups:
+            try:
+                self._write_batch([group])
+            except self._backend.Error as e:
+                if self._backend.is_transient(e):
+                    raise
+                failed.append((group, str(e)))
+        return failed
+
+    def _resolve(self, groups, failed=()):
+        errors = {}
+        for (_, ids), error in failed:
+            for spool_id in ids:
+                self._spool.reject(spool_id, error)
+                errors[spool_id] = error
+        ids = [spool_id for _, group_ids in groups for spool_id in group_ids]
+        self._spool.ack([spool_id for spool_id in ids if spool_id not in errors])
+        oldest_at = self._spool.oldest_enqueued_at()
+        # Tell listeners (caches, watchers) before tickets resolve, so a session that sees
+        # "persisted" never reads a stale cache afterwards
+        persisted = [row for row, group_ids in groups if group_ids[0] not in errors]
+        if persisted:
+            self.publish(persisted)
+        with self._cond:
+            for spool_id in ids:
+                error = errors.get(spool_id)
+                ticket = self._tickets.pop(spool_id, None)
+                if ticket is not None:
+                    ticket._resolve(error)
+                self._stats["failed" if error else "persisted"] += 1
+            self._depth -= len(ids)
+            self._oldest_at = oldest_at or 0.0
+            self._inflight = 0
+            self._replayed.append((time.monotonic(), len(ids)))
+            self._cond.notify_all()
+
+    def _run(self):
+        backoff = WRITE_RETRY_BACKOFF
+        while True:
+            entries = self._take_batch()
+            if entries is None:
+                return
+            if not entries:
+                with self._cond:
+                    self._depth = self._spool.depth()
+                    self._inflight = 0
+                continue
+            groups = self._group(entries)
+            try:
+                try:
+                    self._write_batch(groups)
+                    failed = []
+                except self._backend.Error as e:
+                    if self._backend.is_transient(e):
+                        raise
+                    failed = self._write_isolated(groups) if len(groups) > 1 else [(groups[0], str(e))]
+            except Exception as e:
+                # Server unreachable or connection lost: the rows stay in the spool for the next attempt
+                with self._cond:
+                    self._stats["last_error"] = str(e)
+                    self._stats["retries"] += 1
+                    self._inflight = 0
+                    self._cond.notify_all()
+                if self._stopping:
+                    return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, WRITE_RETRY_BACKOFF_MAX)
+                continue
+            backoff = WRITE_RETRY_BACKOFF
+            if failed:
+                with self._cond:
+                    self._stats["last_error"] = failed[-1][1]
+            self._resolve(groups, failed)
+
+    # Write everything spooled so far; returns False if the timeout expired first
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            try:
+                while self._depth or self._inflight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flush_requested = False
+
+    # Anything not flushed in time stays in the spool and is replayed on the next start
+    def close(self, timeout=30):
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._spool.close()
+        return flushed
+
+    # Rows per second written to the server over the last minute
+    def replay_rate(self, window=60):
+        with self._cond:
+            cutoff = time.monotonic() - window
+            while self._replayed and self._replayed[0][0] < cutoff:
+                self._replayed.popleft()
+            return sum(rows for _, rows in self._replayed) / window
+
+    def metrics(self):
+        rate = self.replay_rate()
+        with self._cond:
+            return {
+                "spool_depth": self._depth,
+                "inflight": self._inflight,
+                "replay_rate": round(rate, 2),
+                "rejected": self._spool.rejected_count(),
+                **self._stats,
+            }
+
+
+# One write-behind queue per server process; flushed when the process exits. Its commits go
+# out on the bus, and other replicas' commits come back in through publish(remote=True), so
+# every cache listening here is invalidated whichever replica wrote.
+@st.cache_resource
+def get_write_queue():
+    queue = WriteBehindQueue(Spool(), get_backend())
+    bus = get_bus()
+    queue.add_listener(bus.publish, remote=False)
+    bus.add_listener(lambda rows: queue.publish(rows, remote=True))
+    atexit.register(queue.close)
+    return queue